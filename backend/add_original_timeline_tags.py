@@ -39,8 +39,8 @@ def modify_get_timeline_events():
             # If the event is being viewed from a different timeline than its original
             if original_timeline and original_timeline.id != int(timeline_id):
                 # Find or create a tag for the original timeline
-                original_tag_name = original_timeline.name.lower()
-                original_tag = Tag.query.filter(db.func.lower(Tag.name) == original_tag_name).first()
+                original_tag_name = original_timeline.name_key
+                original_tag = Tag.query.filter(Tag.name_key == original_tag_name).first()
                 
                 if not original_tag:
                     original_tag = Tag(
@@ -1,5 +1,6 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import selectinload, validates
 from flask_jwt_extended import (
     JWTManager, create_access_token, create_refresh_token,
     jwt_required, get_jwt_identity, get_jwt, decode_token,
@@ -7,17 +8,38 @@ from flask_jwt_extended import (
     verify_jwt_in_request
 )
 from flask_cors import CORS
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
 import logging
 import time
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
-from urllib.parse import parse_qs
+import io
+import json
+import base64
+import hashlib
+import functools
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from cloud_storage import upload_file as cloudinary_upload_file
+from histogram import BUCKET_SIZES, get_timezone, has_fractional_offset, bucket_boundaries, bucket_counts
+from cache_utils import LRUCache, SizedLRUCache, TTLCache, BloomFilter
+from counter_buffer import CounterBuffer
+from link_preview import normalize_url, fetch_link_preview
+from prefix_index import PrefixIndex
+from promotion import (
+    PROMOTION_VOTE_WEIGHT, PROMOTION_SOURCE_WEIGHT, PROMOTION_GRACE_DAYS, PROMOTION_DECAY_PER_DAY,
+    PROMOTION_MIN_TIME_FACTOR, PROMOTION_THRESHOLD, promotion_scores
+)
+from export_formats import EXPORT_FORMATS, csv_chunk, ics_header, ics_event, ics_footer
+from search import SEARCH_KINDS, search_terms, search_sql, encode_search_cursor, decode_search_cursor
+import serializers
+from serializers import (
+    EVENT_FIELDS, MSGPACK_MIMETYPES, parse_fields, parse_include, serialize_event, serialize_events_columnar,
+    serialize_tag, serialize_author, serialize_post, dumps, packb
+)
+from urllib.parse import urlencode
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -63,7 +85,7 @@ CORS(app, resources={
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization", "X-Refresh-Token"],
         "supports_credentials": True,
-        "expose_headers": ["Content-Type", "Authorization"]
+        "expose_headers": ["Content-Type", "Authorization", "ETag"]
     }
 })
 
@@ -86,128 +108,17 @@ def allowed_file(filename):
 def allowed_audio_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_AUDIO_EXTENSIONS
 
-# Function to extract link preview data
-def get_link_preview(url):
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Get title
-        title = soup.title.string if soup.title else ''
-        
-        # Try to get meta description
-        description = ''
-        description_meta = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
-        if description_meta and description_meta.get('content'):
-            description = description_meta.get('content')
-        
-        # Try to get image
-        image = ''
-        image_meta = soup.find('meta', attrs={'property': 'og:image'}) or soup.find('meta', attrs={'name': 'twitter:image'})
-        if image_meta and image_meta.get('content'):
-            image = image_meta.get('content')
-            
-        # If no image found, try to find a significant image on the page
-        if not image:
-            # Look for large images in the page
-            images = soup.find_all('img')
-            for img in images:
-                # Skip tiny images, icons, or images without src
-                src = img.get('src', '')
-                if not src or src.startswith('data:'):
-                    continue
-                    
-                # Check for width/height attributes or style containing dimensions
-                width = img.get('width', '0')
-                height = img.get('height', '0')
-                
-                try:
-                    # Convert to integers if possible
-                    width = int(width) if width and width.isdigit() else 0
-                    height = int(height) if height and height.isdigit() else 0
-                    
-                    # If the image is reasonably sized, use it
-                    if width > 100 and height > 100:
-                        # Convert relative URL to absolute
-                        if not src.startswith(('http://', 'https://')):
-                            base_url = urlparse(url)
-                            base_domain = f"{base_url.scheme}://{base_url.netloc}"
-                            if src.startswith('/'):
-                                src = f"{base_domain}{src}"
-                            else:
-                                src = f"{base_domain}/{src}"
-                        
-                        image = src
-                        break
-                except (ValueError, TypeError):
-                    continue
-        
-        # Get source domain
-        parsed_url = urlparse(url)
-        source = parsed_url.netloc
-        
-        # Special handling for Google searches
-        if 'google.com' in source and '/search' in parsed_url.path:
-            query_params = parse_qs(parsed_url.query)
-            
-            # Extract search query
-            if 'q' in query_params:
-                search_query = query_params['q'][0]
-                if not title or 'Google Search' in title:
-                    title = f"Google Search: {search_query}"
-                if not description:
-                    description = f"Search results for: {search_query}"
-                
-                # If it's an image search, mention that
-                if '/images' in parsed_url.path or 'tbm=isch' in url:
-                    title = f"Google Image Search: {search_query}"
-                    description = f"Image search results for: {search_query}"
-            
-            # If no image yet, use Google logo
-            if not image:
-                image = "https://www.google.com/images/branding/googlelogo/2x/googlelogo_color_272x92dp.png"
-        
-        # Special handling for YouTube
-        elif 'youtube.com' in source or 'youtu.be' in source:
-            # If no image yet, try to get YouTube thumbnail
-            if not image:
-                video_id = None
-                if 'youtube.com/watch' in url and 'v=' in url:
-                    query_params = parse_qs(parsed_url.query)
-                    if 'v' in query_params:
-                        video_id = query_params['v'][0]
-                elif 'youtu.be/' in url:
-                    video_id = url.split('youtu.be/')[1].split('?')[0]
-                
-                if video_id:
-                    image = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
-            
-            # If no description, provide a generic one
-            if not description:
-                description = "YouTube video"
-        
-        # Special handling for Twitter/X
-        elif 'twitter.com' in source or 'x.com' in source:
-            if not image:
-                image = "https://abs.twimg.com/responsive-web/client-web/icon-default.522d363a.png"
-            if not description:
-                description = "Tweet from Twitter/X"
-        
-        return {
-            'title': title,
-            'description': description,
-            'image': image,
-            'source': source,
-            'url': url
-        }
-    except Exception as e:
-        app.logger.error(f'Error fetching link preview: {str(e)}')
-        return None
+def json_response(payload, status=200):
+    """Return a JSON response encoded with the shared fast encoder (see serializers.dumps)"""
+    return app.response_class(dumps(payload), status=status, mimetype='application/json')
+
+def negotiated_response(payload, status=200):
+    """Return MessagePack when the client's Accept header prefers it, JSON otherwise"""
+    if serializers.msgpack is not None:
+        best_match = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+        if best_match in MSGPACK_MIMETYPES:
+            return app.response_class(packb(payload), status=status, mimetype=MSGPACK_MIMETYPES[0])
+    return json_response(payload, status)
 
 # Models
 class UserMusic(db.Model):
@@ -234,12 +145,27 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+def normalize_name(name):
+    """Key that Tag and Timeline names are matched by, ignoring case and surrounding whitespace"""
+    return name.strip().lower()
+
 class Timeline(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
+    name_key = db.Column(db.String(100), nullable=False)  # normalize_name(name), kept in sync by validate_name
     description = db.Column(db.Text)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
     created_at = db.Column(db.DateTime, default=datetime.now())
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped whenever the timeline's events change
+
+    __table_args__ = (
+        db.Index('ix_timeline_name_key', 'name_key', unique=True),
+    )
+
+    @validates('name')
+    def validate_name(self, key, name):
+        self.name_key = normalize_name(name)
+        return name
 
 class Post(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -250,16 +176,27 @@ class Post(db.Model):
     url_title = db.Column(db.String(500))
     url_description = db.Column(db.Text)
     url_image = db.Column(db.String(500))
+    preview_status = db.Column(db.String(10), nullable=True)  # 'pending', 'ok' or 'failed' when url is set (see enrich_link_previews)
     image = db.Column(db.String(500))  # New field for uploaded images
     timeline_id = db.Column(db.Integer, db.ForeignKey('timeline.id'))
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
     created_at = db.Column(db.DateTime, default=datetime.now())
     upvotes = db.Column(db.Integer, default=0)
     comments = db.relationship('Comment', backref='post', lazy=True)
+    tags = db.relationship('Tag', secondary='post_tags', lazy=True)
     promoted_to_event = db.Column(db.Boolean, default=False)
     promotion_score = db.Column(db.Float, default=0.0)
     source_count = db.Column(db.Integer, default=0)
     promotion_votes = db.Column(db.Integer, default=0)
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Maintained by increment_counters
+
+    __table_args__ = (
+        # One per feed sort order, with id breaking ties (see POST_FEED_SORTS)
+        db.Index('ix_post_created_at_id', 'created_at', 'id'),
+        db.Index('ix_post_upvotes_id', 'upvotes', 'id'),
+        db.Index('ix_post_promotion_score_id', 'promotion_score', 'id'),
+        db.Index('ix_post_timeline_event_date', 'timeline_id', 'event_date'),
+    )
 
     def update_promotion_score(self):
         """
@@ -271,19 +208,20 @@ class Post(db.Model):
         experience between posts and their timeline representations.
         """
         # Calculate base score from votes and sources
-        base_score = (self.promotion_votes * 0.7) + (self.source_count * 0.3)
+        # (promotion.promotion_scores is the vectorized version of this; keep them in step)
+        base_score = (self.promotion_votes * PROMOTION_VOTE_WEIGHT) + (self.source_count * PROMOTION_SOURCE_WEIGHT)
         
-        # Apply time decay factor (posts older than 7 days get penalized)
+        # Apply time decay factor (posts older than a week get penalized)
         days_old = (datetime.now() - self.created_at).days
-        time_factor = 1.0 if days_old <= 7 else (1.0 - (0.1 * (days_old - 7)))
-        time_factor = max(0.1, time_factor)  # Don't let it go below 0.1
+        time_factor = 1.0 if days_old <= PROMOTION_GRACE_DAYS else (
+            1.0 - (PROMOTION_DECAY_PER_DAY * (days_old - PROMOTION_GRACE_DAYS))
+        )
+        time_factor = max(PROMOTION_MIN_TIME_FACTOR, time_factor)  # Don't let it go below the floor
         
         # Calculate final score
         self.promotion_score = base_score * time_factor
         
         # Determine if post should be promoted based on score threshold
-        # This threshold might need tuning based on usage patterns
-        PROMOTION_THRESHOLD = 5.0
         self.promoted_to_event = self.promotion_score >= PROMOTION_THRESHOLD
         
         return self.promotion_score
@@ -291,8 +229,19 @@ class Post(db.Model):
 class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
+    name_key = db.Column(db.String(100), nullable=False)  # normalize_name(name), kept in sync by validate_name
     created_at = db.Column(db.DateTime, default=datetime.now)
     timeline_id = db.Column(db.Integer, db.ForeignKey('timeline.id'), nullable=True)
+    event_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Rows in event_tags, maintained by increment_counters
+
+    __table_args__ = (
+        db.Index('ix_tag_name_key', 'name_key', unique=True),
+    )
+
+    @validates('name')
+    def validate_name(self, key, name):
+        self.name_key = normalize_name(name)
+        return name
 
     def __repr__(self):
         return f'<Tag {self.name}>'
@@ -301,14 +250,28 @@ class Tag(db.Model):
 event_tags = db.Table('event_tags',
     db.Column('event_id', db.Integer, db.ForeignKey('event.id')),
     db.Column('tag_id', db.Integer, db.ForeignKey('tag.id')),
-    db.Column('created_at', db.DateTime, default=datetime.now)
+    db.Column('created_at', db.DateTime, default=datetime.now),
+    # Lets tag filters find a tag's events without scanning the table
+    db.Index('ix_event_tags_tag_event', 'tag_id', 'event_id'),
+    # Lets an event's tags be found (tag loading, search index triggers) without scanning the table
+    db.Index('ix_event_tags_event_tag', 'event_id', 'tag_id')
+)
+
+# Post-Tag Association Table
+post_tags = db.Table('post_tags',
+    db.Column('post_id', db.Integer, db.ForeignKey('post.id')),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id')),
+    db.Column('created_at', db.DateTime, default=datetime.now),
+    db.UniqueConstraint('post_id', 'tag_id', name='uq_post_tags_post_tag')
 )
 
 # Event-Timeline Reference Table (for events referenced in multiple timelines)
 event_timeline_refs = db.Table('event_timeline_refs',
     db.Column('event_id', db.Integer, db.ForeignKey('event.id')),
     db.Column('timeline_id', db.Integer, db.ForeignKey('timeline.id')),
-    db.Column('created_at', db.DateTime, default=datetime.now)
+    db.Column('created_at', db.DateTime, default=datetime.now),
+    # Lets a timeline's referenced events be found without scanning the table
+    db.Index('ix_event_timeline_refs_timeline_event', 'timeline_id', 'event_id')
 )
 
 class Event(db.Model):
@@ -321,6 +284,7 @@ class Event(db.Model):
     url_title = db.Column(db.String(500), nullable=True)
     url_description = db.Column(db.Text, nullable=True)
     url_image = db.Column(db.String(500), nullable=True)
+    preview_status = db.Column(db.String(10), nullable=True)  # 'pending', 'ok' or 'failed' when url is set (see enrich_link_previews)
     media_url = db.Column(db.String(500), nullable=True)
     media_type = db.Column(db.String(50), nullable=True)
     timeline_id = db.Column(db.Integer, db.ForeignKey('timeline.id'), nullable=False)
@@ -328,8 +292,14 @@ class Event(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     tags = db.relationship('Tag', secondary=event_tags, backref=db.backref('events', lazy='dynamic'))
+    reference_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Rows in event_timeline_refs, maintained by increment_counters
     referenced_in = db.relationship('Timeline', secondary=event_timeline_refs, backref=db.backref('referenced_events', lazy='dynamic'))
 
+    __table_args__ = (
+        # Serves date-window queries for a single timeline (see get_event_window)
+        db.Index('ix_event_timeline_date', 'timeline_id', 'event_date'),
+    )
+
     def __repr__(self):
         return f'<Event {self.title}>'
 
@@ -341,18 +311,1165 @@ class Comment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now())
     updated_at = db.Column(db.DateTime, default=datetime.now(), onupdate=datetime.now())
 
+    __table_args__ = (
+        db.Index('ix_comment_post_id', 'post_id'),
+    )
+
 class TokenBlocklist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, unique=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=True)  # Naive UTC expiry of the revoked token; the row is useless after it
+
+    __table_args__ = (
+        db.Index('ix_token_blocklist_expires_at', 'expires_at'),
+    )
+
+class TimelineRollup(db.Model):
+    """Pre-aggregated event counts for one timeline, type and time bucket (UTC)"""
+    id = db.Column(db.Integer, primary_key=True)
+    timeline_id = db.Column(db.Integer, db.ForeignKey('timeline.id'), nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)  # 'hour', 'day', 'month' or 'year'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('timeline_id', 'granularity', 'bucket_start', 'type', name='uq_timeline_rollup_bucket'),
+    )
+
+class TimelineStats(db.Model):
+    """Running event count and date range for a timeline"""
+    timeline_id = db.Column(db.Integer, db.ForeignKey('timeline.id'), primary_key=True)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+    first_event_date = db.Column(db.DateTime, nullable=True)
+    last_event_date = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+class TrendingScore(db.Model):
+    """
+    Exponentially decayed activity of a tag or timeline.
+
+    Scores are stored relative to TrendingEpoch: each event adds
+    2 ** ((now - epoch) / half-life), so stored scores rank correctly at
+    any time without decaying every row, and renormalize_trending.py
+    periodically moves the epoch forward to keep the numbers small.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'tag' or 'timeline'
+    entity_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'entity_id', name='uq_trending_score_entity'),
+        db.Index('ix_trending_score_kind_score', 'kind', 'score'),
+    )
+
+class TrendingEpoch(db.Model):
+    """The single reference time (Unix seconds) TrendingScore values are relative to"""
+    id = db.Column(db.Integer, primary_key=True)
+    epoch = db.Column(db.Float, nullable=False)
+
+class LinkPreview(db.Model):
+    """Cached preview of a URL, or the record that fetching it failed"""
+    id = db.Column(db.Integer, primary_key=True)
+    url_key = db.Column(db.String(2048), nullable=False, unique=True)  # normalize_url() of the previewed URL
+    status = db.Column(db.String(10), nullable=False, default='ok')  # 'ok' or 'failed'
+    title = db.Column(db.Text, nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    image = db.Column(db.Text, nullable=True)
+    source = db.Column(db.String(255), nullable=True)
+    etag = db.Column(db.String(255), nullable=True)
+    last_modified = db.Column(db.String(64), nullable=True)
+    failure_count = db.Column(db.Integer, nullable=False, default=0)  # Consecutive failed fetches
+    fetched_at = db.Column(db.DateTime, nullable=False)  # Naive UTC
+    expires_at = db.Column(db.DateTime, nullable=False)  # Naive UTC; refetched (or revalidated) after this
+
+# Timeline rollups
+# Bucket sizes kept in timeline_rollup, finest first
+ROLLUP_GRANULARITIES = ('hour', 'day', 'month', 'year')
+
+def dialect_insert(table):
+    """Return an INSERT construct supporting ON CONFLICT for the active database"""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+def rollup_bucket_start(moment, granularity):
+    """Truncate a naive UTC datetime to the start of its rollup bucket"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'hour':
+        return moment
+    moment = moment.replace(hour=0)
+    if granularity == 'day':
+        return moment
+    moment = moment.replace(day=1)
+    if granularity == 'month':
+        return moment
+    return moment.replace(month=1)
+
+def apply_rollup_counts(rows):
+    """
+    Add (timeline_id, event_date, type) rows to the rollup and stats tables.
+
+    Counts are summed in Python first, then written with one upsert per
+    table, so the caller's transaction stays short however many events
+    are being recorded.
+    """
+    hour_counts = {}
+    timeline_counts = {}
+    for timeline_id, event_date, event_type in rows:
+        key = (timeline_id, rollup_bucket_start(event_date, 'hour'), event_type)
+        hour_counts[key] = hour_counts.get(key, 0) + 1
+        count, first, last = timeline_counts.get(timeline_id, (0, event_date, event_date))
+        timeline_counts[timeline_id] = (count + 1, min(first, event_date), max(last, event_date))
+
+    # Coarser buckets are sums of hour buckets, so only those are truncated per row
+    bucket_counts = {}
+    for (timeline_id, hour_start, event_type), count in hour_counts.items():
+        for granularity in ROLLUP_GRANULARITIES:
+            key = (timeline_id, granularity, rollup_bucket_start(hour_start, granularity), event_type)
+            bucket_counts[key] = bucket_counts.get(key, 0) + count
+
+    if not bucket_counts:
+        return
+
+    rollup_table = TimelineRollup.__table__
+    rollup_insert = dialect_insert(rollup_table)
+    db.session.execute(
+        rollup_insert.on_conflict_do_update(
+            index_elements=['timeline_id', 'granularity', 'bucket_start', 'type'],
+            set_={'event_count': rollup_table.c.event_count + rollup_insert.excluded.event_count}
+        ),
+        [
+            {
+                'timeline_id': timeline_id,
+                'granularity': granularity,
+                'bucket_start': bucket_start,
+                'type': event_type,
+                'event_count': count
+            }
+            for (timeline_id, granularity, bucket_start, event_type), count in bucket_counts.items()
+        ]
+    )
+
+    stats_table = TimelineStats.__table__
+    stats_insert = dialect_insert(stats_table)
+    db.session.execute(
+        stats_insert.on_conflict_do_update(
+            index_elements=['timeline_id'],
+            set_={
+                'event_count': stats_table.c.event_count + stats_insert.excluded.event_count,
+                'first_event_date': db.case(
+                    (stats_table.c.first_event_date.is_(None), stats_insert.excluded.first_event_date),
+                    (stats_insert.excluded.first_event_date < stats_table.c.first_event_date, stats_insert.excluded.first_event_date),
+                    else_=stats_table.c.first_event_date
+                ),
+                'last_event_date': db.case(
+                    (stats_table.c.last_event_date.is_(None), stats_insert.excluded.last_event_date),
+                    (stats_insert.excluded.last_event_date > stats_table.c.last_event_date, stats_insert.excluded.last_event_date),
+                    else_=stats_table.c.last_event_date
+                ),
+                'updated_at': datetime.now()
+            }
+        ),
+        [
+            {
+                'timeline_id': timeline_id,
+                'event_count': count,
+                'first_event_date': first,
+                'last_event_date': last,
+                'updated_at': datetime.now()
+            }
+            for timeline_id, (count, first, last) in timeline_counts.items()
+        ]
+    )
+
+def record_event_rollups(events):
+    """Count newly created events towards every timeline they appear in"""
+    rows = []
+    for event in events:
+        # int() so an event referenced into its own timeline isn't counted twice
+        timeline_ids = {int(event.timeline_id)} | {timeline.id for timeline in event.referenced_in}
+        rows.extend((timeline_id, event.event_date, event.type) for timeline_id in timeline_ids)
+    apply_rollup_counts(rows)
+
+# Trending
+# Time for an event's contribution to a trending score to halve
+TRENDING_HALF_LIFE_SECONDS = 24 * 3600
+
+# Weights double every half-life since the epoch; once this many have passed,
+# the next write renormalizes first so weights never approach float overflow
+# (2 ** 1024) even when renormalize_trending.py isn't scheduled
+TRENDING_MAX_EPOCH_HALF_LIVES = 30
+
+def get_trending_epoch(for_update=False):
+    """
+    Read the trending epoch, creating it on first use.
+
+    The row is locked (shared, or exclusive for the renormalize job) so
+    increments never mix scores from before and after a renormalization.
+    """
+    query = db.session.query(TrendingEpoch.epoch).filter(TrendingEpoch.id == 1)
+    epoch = query.with_for_update(read=not for_update).scalar()
+    if epoch is None:
+        db.session.execute(
+            dialect_insert(TrendingEpoch.__table__).on_conflict_do_nothing(),
+            [{'id': 1, 'epoch': time.time()}]
+        )
+        epoch = query.with_for_update(read=not for_update).scalar()
+    return epoch
+
+def trending_weight(epoch, now=None):
+    """What one unit of activity at ``now`` adds to a score relative to ``epoch``"""
+    return 2 ** (((now or time.time()) - epoch) / TRENDING_HALF_LIFE_SECONDS)
+
+def trending_decay(epoch, now=None):
+    """The factor that turns a stored score into its value at ``now`` (1 / trending_weight, without overflowing)"""
+    return 2 ** -(((now or time.time()) - epoch) / TRENDING_HALF_LIFE_SECONDS)
+
+def record_trending_activity(counts):
+    """
+    Add activity to tags and timelines, as part of the caller's transaction.
+
+    Args:
+        counts: Dict of (kind, entity_id) -> number of events
+    """
+    if not counts:
+        return
+    now = time.time()
+    epoch = db.session.query(TrendingEpoch.epoch).filter(TrendingEpoch.id == 1).scalar()
+    if epoch is not None and now - epoch > TRENDING_MAX_EPOCH_HALF_LIVES * TRENDING_HALF_LIFE_SECONDS:
+        # Two writers racing here both renormalize, the second by a factor of ~1
+        renormalize_trending_scores()
+    weight = trending_weight(get_trending_epoch(), now)
+    trending_table = TrendingScore.__table__
+    trending_insert = dialect_insert(trending_table)
+    db.session.execute(
+        trending_insert.on_conflict_do_update(
+            index_elements=['kind', 'entity_id'],
+            set_={
+                'score': trending_table.c.score + trending_insert.excluded.score,
+                'updated_at': trending_insert.excluded.updated_at
+            }
+        ),
+        [
+            {'kind': kind, 'entity_id': entity_id, 'score': count * weight, 'updated_at': datetime.now()}
+            for (kind, entity_id), count in sorted(counts.items())
+        ]
+    )
+
+def record_event_trending(events):
+    """Count newly created events towards the trending scores of their tags and timelines"""
+    counts = {}
+    for event in events:
+        keys = [('tag', tag.id) for tag in event.tags]
+        timeline_ids = {int(event.timeline_id)} | {timeline.id for timeline in event.referenced_in}
+        keys += [('timeline', timeline_id) for timeline_id in timeline_ids]
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+    record_trending_activity(counts)
+
+def renormalize_trending_scores(min_score=1e-3):
+    """
+    Move the trending epoch to now and rescale every score to match.
+
+    One set-based UPDATE multiplies all scores by the decay since the old
+    epoch, and entries that have decayed to almost nothing are deleted.
+
+    Returns:
+        Tuple of (rows rescaled, rows deleted)
+    """
+    now = time.time()
+    old_epoch = get_trending_epoch(for_update=True)
+    factor = trending_decay(old_epoch, now)
+    rescaled = TrendingScore.query.update(
+        {'score': TrendingScore.score * factor}, synchronize_session=False
+    )
+    deleted = TrendingScore.query.filter(TrendingScore.score < min_score).delete(synchronize_session=False)
+    TrendingEpoch.query.filter(TrendingEpoch.id == 1).update({'epoch': now}, synchronize_session=False)
+    return rescaled, deleted
+
+# Promotion scoring
+
+# Posts read, scored and written back per round-trip by rescore_posts
+PROMOTION_RESCORE_BATCH_SIZE = 50000
+
+def rescore_posts(timeline_ids=None, batch_size=PROMOTION_RESCORE_BATCH_SIZE, now=None, post_ids=None,
+                  commit_every_batch=False):
+    """
+    Recompute promotion_score and promoted_to_event for many posts at once.
+
+    Scores otherwise only change when someone votes, so their time decay
+    goes stale; this is meant to run periodically (see rescore_promotions.py).
+    Posts are streamed in ID order as plain columns, each batch is scored in
+    one vectorized pass, and only the rows whose score or flag changed are
+    written back, with one bulk UPDATE per batch.
+
+    By default everything is left in the caller's transaction. A full run
+    over a large table should pass commit_every_batch=True instead, so the
+    write lock (all of SQLite, in particular) is never held for the whole
+    run; a failure then keeps the batches already committed.
+
+    Args:
+        timeline_ids: Timelines whose posts to rescore; all posts when None
+        batch_size: Number of posts per round-trip
+        now: Time to measure post age against; defaults to now
+        post_ids: Optionally, only these posts
+        commit_every_batch: Commit after each batch's UPDATE
+
+    Returns:
+        Tuple of (posts scored, posts updated)
+    """
+    now = now or datetime.now()
+    query = db.select(
+        Post.id, Post.promotion_votes, Post.source_count, Post.created_at,
+        Post.promotion_score, Post.promoted_to_event
+    ).order_by(Post.id).limit(batch_size)
+    if timeline_ids:
+        query = query.where(Post.timeline_id.in_(timeline_ids))
+    if post_ids is not None:
+        query = query.where(Post.id.in_(post_ids))
+
+    scored = updated = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(query.where(Post.id > last_id)).all()
+        if not rows:
+            break
+        post_ids, votes, sources, created_at, old_scores, old_promoted = zip(*rows)
+        scores, promoted = promotion_scores(votes, sources, created_at, now)
+        changes = [
+            {'post_id': post_id, 'promotion_score': score, 'promoted_to_event': flag}
+            for post_id, score, flag, old_score, old_flag
+            in zip(post_ids, scores.tolist(), promoted.tolist(), old_scores, old_promoted)
+            if score != old_score or flag != old_flag
+        ]
+        if changes:
+            # A Core executemany; the ORM's bulk update by primary key costs several times more per row
+            db.session.execute(
+                db.update(Post.__table__).where(Post.__table__.c.id == db.bindparam('post_id')),
+                changes
+            )
+        if commit_every_batch:
+            db.session.commit()
+        scored += len(rows)
+        updated += len(changes)
+        last_id = post_ids[-1]
+    return scored, updated
+
+# Denormalized counters
+# Post.comment_count, Event.reference_count and Tag.event_count, so lists can
+# show counts without loading collections; reconcile_counters.py repairs drift
+
+def increment_counters(column, deltas):
+    """
+    Atomically add to a counter column of several rows.
+
+    Every row gets a ``column = column + n`` UPDATE, sent as one
+    executemany, so concurrent writers never overwrite each other the way
+    a read-modify-write in Python would.
+
+    Args:
+        column: Counter attribute, e.g. Post.comment_count
+        deltas: Dict of row ID -> amount to add (may be negative)
+    """
+    rows = [{'row_id': row_id, 'amount': amount} for row_id, amount in deltas.items() if amount]
+    if not rows:
+        return
+    table = column.class_.__table__
+    db.session.execute(
+        db.update(table)
+        .where(table.c.id == db.bindparam('row_id'))
+        .values({column.key: db.func.coalesce(table.c[column.key], 0) + db.bindparam('amount')}),
+        rows
+    )
+
+@db.event.listens_for(Comment, 'after_insert')
+def count_inserted_comment(mapper, connection, comment):
+    """Count a new comment towards its post, whichever code path added it."""
+    if comment.post_id is not None:
+        connection.execute(
+            db.update(Post.__table__)
+            .where(Post.__table__.c.id == comment.post_id)
+            .values(comment_count=db.func.coalesce(Post.__table__.c.comment_count, 0) + 1)
+        )
+
+@db.event.listens_for(Comment, 'after_delete')
+def count_deleted_comment(mapper, connection, comment):
+    """Uncount a deleted comment from its post."""
+    if comment.post_id is not None:
+        connection.execute(
+            db.update(Post.__table__)
+            .where(Post.__table__.c.id == comment.post_id)
+            .values(comment_count=db.func.coalesce(Post.__table__.c.comment_count, 0) - 1)
+        )
+
+# Counter column -> (link table, link column counted per row)
+COUNTER_SOURCES = {
+    'post.comment_count': (Post.comment_count, Comment.__table__, Comment.__table__.c.post_id),
+    'event.reference_count': (Event.reference_count, event_timeline_refs, event_timeline_refs.c.event_id),
+    'tag.event_count': (Tag.event_count, event_tags, event_tags.c.tag_id),
+}
+
+def reconcile_counters(names=None):
+    """
+    Recount denormalized counters from their source tables.
+
+    One set-based UPDATE per counter rewrites only the rows that drifted,
+    using a correlated count over the indexed link column.
+
+    Args:
+        names: Keys of COUNTER_SOURCES to fix; all of them when None
+
+    Returns:
+        Dict of counter name -> number of rows corrected
+    """
+    fixed = {}
+    for name in names or COUNTER_SOURCES:
+        column, source_table, source_column = COUNTER_SOURCES[name]
+        table = column.class_.__table__
+        actual = db.select(db.func.count()).select_from(source_table)\
+            .where(source_column == table.c.id)\
+            .scalar_subquery()
+        result = db.session.execute(
+            db.update(table)
+            .where(db.or_(table.c[column.key].is_(None), table.c[column.key] != actual))
+            .values({column.key: actual})
+        )
+        fixed[name] = result.rowcount
+    return fixed
+
+def release_timeline_references(timeline_id):
+    """Delete every reference to a timeline, uncounting it from the referencing events."""
+    event_ids = db.session.execute(
+        db.select(event_timeline_refs.c.event_id).where(event_timeline_refs.c.timeline_id == timeline_id)
+    ).scalars().all()
+    reference_deltas = {}
+    for event_id in event_ids:
+        reference_deltas[event_id] = reference_deltas.get(event_id, 0) - 1
+    increment_counters(Event.reference_count, reference_deltas)
+    db.session.execute(event_timeline_refs.delete().where(event_timeline_refs.c.timeline_id == timeline_id))
+
+# Promotion votes
+
+# Votes are buffered per post and written every few seconds, or sooner once
+# this many are waiting; a crashed worker loses at most that many votes
+PROMOTION_VOTE_FLUSH_SECONDS = 2.0
+PROMOTION_VOTE_MAX_PENDING = 1000
+# Votes kept for retry while flushes fail (e.g. the database is down); beyond
+# this, failed batches are dropped and logged
+PROMOTION_VOTE_MAX_RETAINED = 10000
+
+# Posts known to exist, so a vote costs no query in the common case; the TTL
+# bounds how long votes for a deleted post are still accepted
+KNOWN_POST_CACHE_SIZE = 10000
+KNOWN_POST_TTL_SECONDS = 300
+known_post_cache = TTLCache(KNOWN_POST_CACHE_SIZE, KNOWN_POST_TTL_SECONDS)
+
+def post_exists(post_id):
+    """Whether a post exists, answered from known_post_cache when possible."""
+    if known_post_cache.get(post_id):
+        return True
+    exists = db.session.query(Post.id).filter(Post.id == post_id).first() is not None
+    if exists:
+        known_post_cache.set(post_id, True)
+    return exists
+
+def flush_promotion_votes(votes):
+    """
+    Apply buffered promotion votes and rescore the posts they touched.
+
+    Each post gets one atomic promotion_votes + n update, so concurrent
+    workers and voters never lose each other's increments.
+
+    Args:
+        votes: Dict of post ID -> number of new votes
+    """
+    with app.app_context():
+        try:
+            increment_counters(Post.promotion_votes, votes)
+            rescore_posts(post_ids=list(votes))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error flushing promotion votes: {str(e)}")
+            raise
+
+promotion_vote_buffer = CounterBuffer(
+    flush_promotion_votes,
+    interval=PROMOTION_VOTE_FLUSH_SECONDS,
+    max_pending=PROMOTION_VOTE_MAX_PENDING,
+    max_retained=PROMOTION_VOTE_MAX_RETAINED
+)
+
+def clear_timeline_rollups(timeline_ids):
+    """Drop the rollup and stats rows of the given timelines"""
+    TimelineRollup.query.filter(TimelineRollup.timeline_id.in_(timeline_ids)).delete(synchronize_session=False)
+    TimelineStats.query.filter(TimelineStats.timeline_id.in_(timeline_ids)).delete(synchronize_session=False)
+
+def rebuild_timeline_rollups(timeline_ids=None, batch_size=10000):
+    """
+    Recompute rollups from the event table.
+
+    Args:
+        timeline_ids: Timelines to rebuild; all timelines when None
+        batch_size: Number of event rows streamed per round-trip
+
+    Returns:
+        The number of (timeline, event) memberships counted
+    """
+    # Every distinct (timeline, event) membership, direct or referenced
+    memberships = db.union(
+        db.select(Event.timeline_id.label('timeline_id'), Event.id.label('event_id')),
+        db.select(
+            event_timeline_refs.c.timeline_id.label('timeline_id'),
+            event_timeline_refs.c.event_id.label('event_id')
+        )
+    ).subquery()
+    membership_query = db.select(memberships.c.timeline_id, Event.event_date, Event.type)\
+        .join(Event, Event.id == memberships.c.event_id)
+
+    if timeline_ids is None:
+        TimelineRollup.query.delete(synchronize_session=False)
+        TimelineStats.query.delete(synchronize_session=False)
+    else:
+        timeline_ids = list(timeline_ids)
+        clear_timeline_rollups(timeline_ids)
+        membership_query = membership_query.where(memberships.c.timeline_id.in_(timeline_ids))
+
+    counted = 0
+    rows = []
+    result = db.session.execute(membership_query.execution_options(yield_per=batch_size))
+    for row in result:
+        rows.append(tuple(row))
+        if len(rows) >= batch_size:
+            apply_rollup_counts(rows)
+            counted += len(rows)
+            rows = []
+    apply_rollup_counts(rows)
+    return counted + len(rows)
+
+# Tag resolution
+def clean_tag_names(tag_names):
+    """Normalize a list of tag names the way create_timeline_v3_event does, dropping blanks and duplicates"""
+    cleaned = []
+    for tag_name in tag_names or []:
+        if not isinstance(tag_name, str):
+            raise ValueError('Tags must be strings')
+        tag_name = normalize_name(tag_name)
+        if tag_name and tag_name not in cleaned:
+            cleaned.append(tag_name)
+    return cleaned
+
+def resolve_tags(tag_names, created_by, with_timelines=True):
+    """
+    Find or create the tags (and their tag timelines) for a list of names.
+
+    Existing tags are found with one IN query. Missing tag timelines and
+    tags are created with INSERT ... ON CONFLICT DO NOTHING and then read
+    back, so a worker racing another over the same new tag uses whichever
+    row won instead of failing on the unique constraint. New tags get an
+    existing '<name>'/'#<name>' timeline or a new ALL CAPS one, as in
+    create_timeline_v3_event.
+
+    Args:
+        tag_names: Cleaned (lowercase) tag names, see clean_tag_names
+        created_by: User ID recorded on newly created timelines
+        with_timelines: Whether new tags get a tag timeline
+
+    Returns:
+        Dict of tag name -> Tag
+    """
+    tag_names = set(tag_names)
+    if not tag_names:
+        return {}
+        
+    def load_tags(names):
+        return {tag.name_key: tag for tag in Tag.query.filter(Tag.name_key.in_(names))}
+        
+    tags = load_tags(tag_names)
+    # Sorted so concurrent transactions take row locks in the same order
+    missing_names = sorted(tag_names - set(tags))
+    if not missing_names:
+        return tags
+        
+    timeline_ids = {}
+    if with_timelines:
+        def load_timelines(names):
+            lookup_names = set(names) | {f'#{tag_name}' for tag_name in names}
+            for timeline_id, timeline_key in db.session.query(Timeline.id, Timeline.name_key)\
+                    .filter(Timeline.name_key.in_(lookup_names))\
+                    .order_by(Timeline.id):
+                timeline_ids.setdefault(timeline_key.lstrip('#'), timeline_id)
+                
+        # Reuse timelines already named after the tag (with or without '#')
+        load_timelines(missing_names)
+        new_timeline_names = [tag_name for tag_name in missing_names if tag_name not in timeline_ids]
+        if new_timeline_names:
+            db.session.execute(
+                dialect_insert(Timeline.__table__).on_conflict_do_nothing(),
+                [
+                    {
+                        'name': tag_name.upper(),
+                        'name_key': tag_name,
+                        'description': f'Timeline for #{tag_name}',
+                        'created_by': created_by,
+                        'created_at': datetime.now()
+                    }
+                    for tag_name in new_timeline_names
+                ]
+            )
+            load_timelines(new_timeline_names)
+            
+    db.session.execute(
+        dialect_insert(Tag.__table__).on_conflict_do_nothing(),
+        [
+            {
+                'name': tag_name,
+                'name_key': tag_name,
+                'timeline_id': timeline_ids.get(tag_name),
+                'created_at': datetime.now()
+            }
+            for tag_name in missing_names
+        ]
+    )
+    tags.update(load_tags(missing_names))
+    mark_autocomplete_stale()
+    return tags
+
+# Timeline versions and response caching
+# Rendered GET responses, keyed by ETag (which embeds the data version).
+# Bounded in bytes as well as entries, since event lists can be large
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+RESPONSE_CACHE_MAX_ITEM_BYTES = 4 * 1024 * 1024
+
+response_cache = SizedLRUCache(
+    maxsize=256,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    max_item_bytes=RESPONSE_CACHE_MAX_ITEM_BYTES,
+    sizeof=lambda cached: len(cached[0])  # (body, mimetype)
+)
+
+def bump_timeline_versions(timeline_ids):
+    """Invalidate cached reads of the given timelines, as part of the caller's transaction"""
+    timeline_ids = {timeline_id for timeline_id in timeline_ids if timeline_id is not None}
+    if timeline_ids:
+        Timeline.query.filter(Timeline.id.in_(timeline_ids))\
+            .update({'version': Timeline.version + 1}, synchronize_session=False)
+
+def timeline_version_key(timeline_id):
+    """Cache state for reads of one timeline, or None if it doesn't exist"""
+    version = db.session.query(Timeline.version).filter(Timeline.id == timeline_id).scalar()
+    return None if version is None else str(version)
+
+def timeline_list_version_key():
+    """Cache state for the timeline listing: changes on any create, delete or version bump"""
+    count, max_id, version_sum = db.session.query(
+        db.func.count(Timeline.id), db.func.max(Timeline.id), db.func.sum(Timeline.version)
+    ).one()
+    return f'{count}-{max_id}-{version_sum}'
+
+def cache_by_version(version_key, cache_body=True, request_state=None):
+    """
+    Serve a GET endpoint through the ETag-validated response cache.
+
+    The ETag is derived from the request path, its query string and
+    ``version_key(**view_args)``, so it changes as soon as the underlying
+    data does. A matching If-None-Match gets a bare 304, and a repeated
+    request is answered from the rendered body without touching the view.
+    When version_key returns None the view runs uncached (e.g. to 404).
+    Streamed views pass cache_body=False to get the ETag and 304s only.
+    Views whose result also depends on something outside the data, such as
+    the current time, pass ``request_state()`` returning a string for it.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            state = version_key(**kwargs)
+            if state is None:
+                return view(*args, **kwargs)
+            if request_state is not None:
+                state = f'{state}#{request_state()}'
+            
+            # The Accept header is part of the key because some endpoints negotiate their format
+            query = urlencode(sorted(request.args.items(multi=True)))
+            accept = request.headers.get('Accept', '')
+            etag = hashlib.sha1(f'{request.path}?{query}#{accept}#{state}'.encode()).hexdigest()
+            
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            elif not cache_body:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            else:
+                cached = response_cache.get(etag)
+                if cached is None:
+                    response = app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    cached = (response.get_data(), response.mimetype)
+                    response_cache.set(etag, cached)
+                response = app.response_class(cached[0], mimetype=cached[1])
+                
+            # Let browsers keep the body but revalidate it on every use
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
+
+# User summaries
+# The few user columns shown next to content, cached per worker so payloads
+# can embed authors without a query per row. update_profile invalidates its
+# own worker's entry; other workers catch up within the TTL. Bodies stored
+# by cache_by_version outlive that TTL, so they load authors fresh instead.
+USER_SUMMARY_CACHE_SIZE = 10000
+USER_SUMMARY_TTL_SECONDS = 300
+
+UserSummary = namedtuple('UserSummary', ['id', 'username', 'email', 'avatar_url'])
+user_summary_cache = TTLCache(USER_SUMMARY_CACHE_SIZE, USER_SUMMARY_TTL_SECONDS)
+
+def get_user_summaries(user_ids, use_cache=True):
+    """
+    Look up several users' summaries, loading the uncached ones with one IN query.
+
+    Args:
+        user_ids: User IDs (ints or numeric strings, e.g. a JWT identity); None is skipped
+        use_cache: False to load every summary from the database (refreshing
+            the cache), e.g. for a body cached under a timeline version
+
+    Returns:
+        Dict of user ID -> UserSummary; users that don't exist are left out
+    """
+    summaries = {}
+    missing = set()
+    for user_id in {int(user_id) for user_id in user_ids if user_id is not None}:
+        summary = user_summary_cache.get(user_id) if use_cache else None
+        if summary is None:
+            missing.add(user_id)
+        else:
+            summaries[user_id] = summary
+    if missing:
+        rows = db.session.query(User.id, User.username, User.email, User.avatar_url).filter(User.id.in_(missing))
+        for row in rows:
+            summary = UserSummary(*row)
+            user_summary_cache.set(summary.id, summary)
+            summaries[summary.id] = summary
+    return summaries
+
+def get_user_summary(user_id):
+    """Look up one user's summary, or None if the user doesn't exist."""
+    if user_id is None:
+        return None
+    return get_user_summaries([user_id]).get(int(user_id))
+
+def author_payloads(events, use_cache=True):
+    """
+    Build the embedded author of each event (None for deleted users), parallel to events.
+
+    Responses served through cache_by_version must pass use_cache=False: a
+    profile change bumps the timeline versions, but another worker's cached
+    summary could otherwise be stored under the new version's ETag.
+    """
+    summaries = get_user_summaries({event.created_by for event in events}, use_cache=use_cache)
+    authors = {user_id: serialize_author(summary) for user_id, summary in summaries.items()}
+    return [authors.get(event.created_by) for event in events]
+
+def user_timeline_ids(user_id):
+    """IDs of every timeline showing an event created by the user, directly or by reference."""
+    user_events = db.select(Event.id).where(Event.created_by == user_id)
+    direct = db.select(Event.timeline_id).where(Event.created_by == user_id)
+    referenced = db.select(event_timeline_refs.c.timeline_id).where(event_timeline_refs.c.event_id.in_(user_events))
+    return set(db.session.execute(db.union(direct, referenced)).scalars())
+
+# Link previews
+# Fetched previews are kept in link_preview, keyed by normalized URL, so a
+# link pasted again doesn't contact its host until the row expires, and is
+# then revalidated with its ETag/Last-Modified. Failures are cached too,
+# for a backoff that doubles with each consecutive failure. Each worker
+# keeps recently used rows in memory in front of the table.
+LINK_PREVIEW_TTL = timedelta(days=7)
+LINK_PREVIEW_FAILURE_TTL = timedelta(hours=1)
+LINK_PREVIEW_MAX_FAILURE_TTL = timedelta(days=1)
+LINK_PREVIEW_CACHE_SIZE = 4096
+
+# url_key -> (expires_at, preview fields, or None for a cached failure)
+link_preview_cache = LRUCache(LINK_PREVIEW_CACHE_SIZE)
+
+LINK_PREVIEW_FIELDS = ('title', 'description', 'image', 'source')
+
+def link_preview_failure_ttl(failure_count):
+    """How long to wait before retrying a URL that has failed failure_count times in a row."""
+    return min(LINK_PREVIEW_FAILURE_TTL * 2 ** max(failure_count - 1, 0), LINK_PREVIEW_MAX_FAILURE_TTL)
+
+def get_link_preview(url):
+    """
+    Preview a URL, contacting its host only when no fresh copy is cached.
+
+    Lookups go through this worker's LRU, then the link_preview table, and
+    only then to the network. The normalized URL is only the cache key; the
+    page is fetched from the URL as given. The row is written on its own
+    connection, so the caller's session is neither flushed nor committed.
+
+    Returns:
+        Dict with title, description, image, source and url, or None if the
+        URL isn't http(s) or can't currently be previewed
+    """
+    try:
+        url_key = normalize_url(url)
+    except ValueError:
+        return None
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    cached = link_preview_cache.get(url_key)
+    if cached is not None and cached[0] > now:
+        return dict(cached[1], url=url) if cached[1] is not None else None
+
+    table = LinkPreview.__table__
+    with db.engine.connect() as connection:
+        row = connection.execute(db.select(table).where(table.c.url_key == url_key)).first()
+    if row is not None and row.expires_at > now:
+        fields = {field: getattr(row, field) for field in LINK_PREVIEW_FIELDS} if row.status == 'ok' else None
+        link_preview_cache.set(url_key, (row.expires_at, fields))
+        return dict(fields, url=url) if fields is not None else None
+
+    # Missing or expired: fetch, revalidating the copy we have if it's usable
+    has_copy = row is not None and row.status == 'ok'
+    values = dict(row._mapping) if row is not None else {'url_key': url_key}
+    values.pop('id', None)
+    values['fetched_at'] = now
+    try:
+        preview, etag, last_modified = fetch_link_preview(
+            url.strip(),
+            etag=row.etag if has_copy else None,
+            last_modified=row.last_modified if has_copy else None
+        )
+    except Exception as e:
+        app.logger.warning(f'Error fetching link preview for {url}: {str(e)}')
+        values['failure_count'] = (values.get('failure_count') or 0) + 1
+        values['expires_at'] = now + link_preview_failure_ttl(values['failure_count'])
+        if not has_copy:
+            # Nothing to fall back on; a stale preview keeps being served instead
+            values.update(status='failed', etag=None, last_modified=None)
+            values.update({field: None for field in LINK_PREVIEW_FIELDS})
+    else:
+        values.update(status='ok', failure_count=0, etag=etag, last_modified=last_modified,
+                      expires_at=now + LINK_PREVIEW_TTL)
+        if preview is not None:
+            values.update({field: preview[field] for field in LINK_PREVIEW_FIELDS})
+
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(
+                dialect_insert(table).values(**values).on_conflict_do_update(
+                    index_elements=['url_key'],
+                    set_={name: value for name, value in values.items() if name != 'url_key'}
+                )
+            )
+    except Exception as e:
+        # The preview is still good for this request; it'll just be fetched again
+        app.logger.error(f'Error caching link preview for {url_key}: {str(e)}')
+
+    fields = {field: values[field] for field in LINK_PREVIEW_FIELDS} if values['status'] == 'ok' else None
+    link_preview_cache.set(url_key, (values['expires_at'], fields))
+    return dict(fields, url=url) if fields is not None else None
+
+# Link preview enrichment
+# Create endpoints commit rows with preview_status 'pending' and hand the URL
+# to a per-worker thread pool, so writes never wait on remote hosts. The pool
+# fills in url_title, url_description and url_image and sets the status to
+# 'ok' or 'failed'. Its queue is bounded; rows it has no room for, bulk
+# imports, and rows left pending by a restart are picked up in batches by
+# enrich_link_previews.py.
+LINK_PREVIEW_WORKERS = 4
+LINK_PREVIEW_MAX_QUEUED = 1000
+LINK_PREVIEW_BATCH_SIZE = 100
+
+link_preview_pool = {'executor': None, 'queued': 0}
+link_preview_pool_lock = threading.Lock()
+
+def link_preview_executor():
+    """This worker's enrichment pool, started on first use."""
+    with link_preview_pool_lock:
+        if link_preview_pool['executor'] is None:
+            link_preview_pool['executor'] = ThreadPoolExecutor(LINK_PREVIEW_WORKERS, thread_name_prefix='link-preview')
+        return link_preview_pool['executor']
+
+def run_link_preview_task(model, row_id, url):
+    """Enrich one row on the pool, then free its queue slot."""
+    try:
+        enrich_link_previews(model, [(row_id, url)])
+    finally:
+        with link_preview_pool_lock:
+            link_preview_pool['queued'] -= 1
+
+def schedule_link_previews(model, rows):
+    """
+    Queue preview enrichment for rows that have been committed as pending.
+
+    Rows beyond LINK_PREVIEW_MAX_QUEUED waiting in this worker stay pending
+    for enrich_link_previews.py.
+
+    Args:
+        model: Event or Post
+        rows: Iterable of (row ID, URL)
+
+    Returns:
+        The number of rows queued
+    """
+    rows = list(rows)
+    with link_preview_pool_lock:
+        rows = rows[:max(LINK_PREVIEW_MAX_QUEUED - link_preview_pool['queued'], 0)]
+        link_preview_pool['queued'] += len(rows)
+    if rows:
+        executor = link_preview_executor()
+        for row_id, url in rows:
+            executor.submit(run_link_preview_task, model, row_id, url)
+    return len(rows)
+
+def link_preview_values(preview):
+    """Column values recording a fetched preview, or the failure to fetch one (None)."""
+    if preview is None:
+        return {'preview_status': 'failed'}
+    image = preview['image'] or None
+    return {
+        'url_title': (preview['title'] or '')[:500],
+        'url_description': preview['description'],
+        # A truncated image URL would be broken, so longer ones are dropped
+        'url_image': image if image and len(image) <= 500 else None,
+        'preview_status': 'ok'
+    }
+
+def fetch_link_previews(urls):
+    """Previews of several URLs (None where unavailable), fetched LINK_PREVIEW_WORKERS at a time."""
+    def fetch(url):
+        with app.app_context():
+            return get_link_preview(url)
+    if len(urls) <= 1:
+        return [fetch(url) for url in urls]
+    with ThreadPoolExecutor(LINK_PREVIEW_WORKERS, thread_name_prefix='link-preview-batch') as executor:
+        return list(executor.map(fetch, urls))
+
+def enrich_link_previews(model, rows):
+    """
+    Fetch the previews of pending rows and store them in one transaction.
+
+    Runs in its own app context, on the enrichment pool or from
+    enrich_link_previews.py. Results are written with one executemany
+    UPDATE per outcome, and for events the versions of the timelines
+    showing them are bumped once for the whole batch. Rows that were
+    already enriched or whose URL has changed since are left alone.
+
+    Args:
+        model: Event or Post
+        rows: List of (row ID, URL)
+
+    Returns:
+        The number of rows updated
+    """
+    previews = fetch_link_previews([url for _, url in rows])
+    with app.app_context():
+        try:
+            # executemany needs the same keys in every parameter set, so ok and failed rows go separately
+            outcomes = {}
+            for (row_id, url), preview in zip(rows, previews):
+                values = dict(link_preview_values(preview), row_id=row_id, row_url=url)
+                outcomes.setdefault(values['preview_status'], []).append(values)
+            table = model.__table__
+            statement = db.update(table).where(
+                table.c.id == db.bindparam('row_id'),
+                table.c.url == db.bindparam('row_url'),
+                table.c.preview_status == 'pending'
+            )
+            updated = sum(db.session.execute(statement, values).rowcount for values in outcomes.values())
+            if updated and model is Event:
+                # Cached reads of every timeline showing the events are now stale
+                event_ids = [row_id for row_id, _ in rows]
+                timeline_ids = set(db.session.execute(
+                    db.select(Event.timeline_id).where(Event.id.in_(event_ids))
+                ).scalars())
+                timeline_ids |= set(db.session.execute(
+                    db.select(event_timeline_refs.c.timeline_id).where(event_timeline_refs.c.event_id.in_(event_ids))
+                ).scalars())
+                bump_timeline_versions(timeline_ids)
+            db.session.commit()
+            return updated
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f'Error enriching link previews of {len(rows)} {model.__tablename__} rows: {str(e)}')
+            return 0
+
+# Autocomplete
+# How often a worker picks up tags and timelines created elsewhere, and fully reloads usage weights
+AUTOCOMPLETE_SYNC_SECONDS = 10
+AUTOCOMPLETE_RELOAD_SECONDS = 300
+
+# Per-worker prefix index of tag and timeline names, weighted by how many events use them
+autocomplete_index = PrefixIndex()
+autocomplete_state = {'synced_at': 0.0, 'reloaded_at': 0.0, 'max_tag_id': 0, 'max_timeline_id': 0}
+autocomplete_sync_lock = threading.Lock()
+
+def load_autocomplete_entries(after_tag_id=0, after_timeline_id=0):
+    """Load (kind, id, name, weight) rows for tags and timelines newer than the given IDs"""
+    tag_rows = db.session.query(Tag.id, Tag.name, Tag.event_count).filter(Tag.id > after_tag_id)
+    timeline_rows = db.session.query(Timeline.id, Timeline.name, TimelineStats.event_count)\
+        .outerjoin(TimelineStats, TimelineStats.timeline_id == Timeline.id)\
+        .filter(Timeline.id > after_timeline_id)
+    return [('tag', *row) for row in tag_rows] + [('timeline', *row) for row in timeline_rows]
+
+def sync_autocomplete_index():
+    """
+    Bring the autocomplete index up to date, at most once per AUTOCOMPLETE_SYNC_SECONDS.
+
+    Between syncs lookups never touch the database. A sync loads only rows
+    with IDs above the last seen ones; every AUTOCOMPLETE_RELOAD_SECONDS the
+    index is rebuilt to refresh usage weights and drop deleted names.
+    """
+    now = time.monotonic()
+    if now - autocomplete_state['synced_at'] < AUTOCOMPLETE_SYNC_SECONDS:
+        return
+    # Another thread is already syncing; answer from the current index
+    if not autocomplete_sync_lock.acquire(blocking=False):
+        return
+    try:
+        if now - autocomplete_state['reloaded_at'] >= AUTOCOMPLETE_RELOAD_SECONDS:
+            entries = load_autocomplete_entries()
+            autocomplete_index.replace(entries)
+            autocomplete_state['reloaded_at'] = now
+        else:
+            entries = load_autocomplete_entries(autocomplete_state['max_tag_id'], autocomplete_state['max_timeline_id'])
+            for entry in entries:
+                autocomplete_index.add(*entry)
+        for kind, entry_id, _, _ in entries:
+            state_key = 'max_tag_id' if kind == 'tag' else 'max_timeline_id'
+            autocomplete_state[state_key] = max(autocomplete_state[state_key], entry_id)
+        autocomplete_state['synced_at'] = now
+    finally:
+        autocomplete_sync_lock.release()
+
+def mark_autocomplete_stale():
+    """Make the next autocomplete lookup in this worker pick up newly created names"""
+    autocomplete_state['synced_at'] = 0.0
+
+def timeline_stats_json(stats):
+    """Serialize a TimelineStats row (or its absence) for timeline responses"""
+    return {
+        'event_count': stats.event_count if stats else 0,
+        'first_event_date': stats.first_event_date.isoformat() if stats and stats.first_event_date else None,
+        'last_event_date': stats.last_event_date.isoformat() if stats and stats.last_event_date else None
+    }
+
+# Token revocation
+# Each worker mirrors the blocklist in memory: a Bloom filter of every
+# unexpired revoked jti answers "not revoked" for almost all tokens without
+# a query, and an exact set of recently seen revocations answers the rest.
+# New rows are picked up by ID every REVOCATION_SYNC_SECONDS, so a logout in
+# another worker takes effect here within that window.
+REVOCATION_SYNC_SECONDS = 5
+# Each sync rereads this many IDs below the last one seen, so a row whose ID
+# was allocated before a later row's but committed after it isn't skipped
+REVOCATION_SYNC_OVERLAP = 100
+REVOCATION_RELOAD_SECONDS = 3600
+REVOCATION_RECENT_SIZE = 10000
+REVOCATION_BLOOM_CAPACITY = 10000
+REVOCATION_BLOOM_ERROR_RATE = 0.001
+
+revocation_state = {
+    'bloom': BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE),
+    'revoked': LRUCache(REVOCATION_RECENT_SIZE),  # jtis known to be revoked
+    'cleared': LRUCache(REVOCATION_RECENT_SIZE),  # Bloom false positives already checked
+    'last_id': 0,
+    'synced_at': float('-inf'),
+    'reloaded_at': float('-inf')
+}
+revocation_sync_lock = threading.Lock()
+
+def remember_revoked_token(jti):
+    """Record a revoked jti in this worker's revocation cache."""
+    revocation_state['bloom'].add(jti)
+    revocation_state['revoked'].set(jti, True)
+    revocation_state['cleared'].delete(jti)
+
+def sync_revoked_tokens():
+    """
+    Bring the revocation cache up to date, at most once per REVOCATION_SYNC_SECONDS.
+
+    A sync loads only blocklist rows with IDs above the last seen one (less
+    REVOCATION_SYNC_OVERLAP). Every REVOCATION_RELOAD_SECONDS (or once the
+    filter outgrows its capacity) the filter is rebuilt from the unexpired
+    rows, which drops purged tokens. Either way every newly seen row is
+    remembered as revoked, so a jti cleared earlier as a false positive is
+    never answered from the cleared set once it has been revoked.
+    """
+    now = time.monotonic()
+    if now - revocation_state['synced_at'] < REVOCATION_SYNC_SECONDS:
+        return
+    # Another thread is already syncing; answer from the current cache
+    if not revocation_sync_lock.acquire(blocking=False):
+        return
+    try:
+        query = db.session.query(TokenBlocklist.id, TokenBlocklist.jti).order_by(TokenBlocklist.id)
+        if now - revocation_state['reloaded_at'] >= REVOCATION_RELOAD_SECONDS or revocation_state['bloom'].is_full():
+            utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+            rows = query.filter(db.or_(
+                TokenBlocklist.expires_at.is_(None),
+                TokenBlocklist.expires_at > utc_now
+            )).all()
+            # Fill the new filter before swapping it in, leaving room to grow before the next rebuild
+            bloom = BloomFilter(max(REVOCATION_BLOOM_CAPACITY, 2 * len(rows)), REVOCATION_BLOOM_ERROR_RATE)
+            for _, jti in rows:
+                bloom.add(jti)
+            revocation_state['bloom'] = bloom
+            revocation_state['reloaded_at'] = now
+            # Previously cleared false positives may have been revoked since; check them again
+            revocation_state['cleared'].clear()
+            new_rows = [(row_id, jti) for row_id, jti in rows
+                        if row_id > revocation_state['last_id'] - REVOCATION_SYNC_OVERLAP]
+        else:
+            new_rows = rows = query.filter(
+                TokenBlocklist.id > revocation_state['last_id'] - REVOCATION_SYNC_OVERLAP
+            ).all()
+        for _, jti in new_rows:
+            remember_revoked_token(jti)
+        if rows:
+            revocation_state['last_id'] = max(revocation_state['last_id'], rows[-1][0])
+        revocation_state['synced_at'] = now
+    finally:
+        revocation_sync_lock.release()
+
+def purge_expired_tokens():
+    """
+    Delete blocklist rows whose tokens have expired and can no longer be used.
+
+    Returns:
+        The number of rows deleted
+    """
+    utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return TokenBlocklist.query.filter(TokenBlocklist.expires_at < utc_now).delete(synchronize_session=False)
 
 # JWT Configuration
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
     jti = jwt_payload["jti"]
-    token = TokenBlocklist.query.filter_by(jti=jti).first()
-    return token is not None
+    sync_revoked_tokens()
+    if revocation_state['revoked'].get(jti):
+        return True
+    if jti not in revocation_state['bloom'] or revocation_state['cleared'].get(jti):
+        return False
+    # A Bloom filter hit is either an older revocation or a false positive
+    revoked = db.session.query(TokenBlocklist.id).filter_by(jti=jti).first() is not None
+    if revoked:
+        revocation_state['revoked'].set(jti, True)
+    else:
+        revocation_state['cleared'].set(jti, True)
+    return revoked
 
 @jwt.unauthorized_loader
 def unauthorized_callback(error):
@@ -494,6 +1611,7 @@ def create_timeline():
     )
     db.session.add(new_timeline)
     db.session.commit()
+    autocomplete_index.add('timeline', new_timeline.id, new_timeline.name)
     return jsonify({'message': 'Timeline created successfully', 'id': new_timeline.id}), 201
 
 @app.route('/api/timeline/<int:timeline_id>', methods=['GET'])
@@ -509,7 +1627,12 @@ def get_timeline(timeline_id):
 
 @app.route('/api/timeline/<int:timeline_id>/posts', methods=['GET'])
 def get_timeline_posts(timeline_id):
-    posts = Post.query.filter_by(timeline_id=timeline_id).order_by(Post.event_date.desc()).all()
+    # Authors are joined in rather than looked up once per post
+    rows = db.session.query(Post, User.username)\
+        .outerjoin(User, Post.created_by == User.id)\
+        .filter(Post.timeline_id == timeline_id)\
+        .order_by(Post.event_date.desc())\
+        .all()
     return jsonify([{
         'id': post.id,
         'title': post.title,
@@ -519,13 +1642,14 @@ def get_timeline_posts(timeline_id):
         'url_title': post.url_title,
         'url_description': post.url_description,
         'url_image': post.url_image,
+        'preview_status': post.preview_status,
         'image': post.image,
         'created_by': post.created_by,
         'created_at': post.created_at.isoformat(),
         'upvotes': post.upvotes,
-        'username': User.query.get(post.created_by).username,
-        'display_type': post.display_type
-    } for post in posts])
+        'comment_count': post.comment_count,
+        'username': username
+    } for post, username in rows])
 
 @app.route('/api/timeline/<int:timeline_id>/posts', methods=['POST'])
 def create_post(timeline_id):
@@ -545,19 +1669,14 @@ def create_post(timeline_id):
             created_by=1  # Temporary default user ID
         )
         
+        # The link preview is fetched in the background once the post is saved
         if new_post.url:
-            try:
-                link_preview = get_link_preview(new_post.url)
-                new_post.url_title = link_preview['url_title']
-                new_post.url_description = link_preview['url_description']
-                new_post.url_image = link_preview['url_image']
-            except Exception as preview_error:
-                print(f"Error fetching link preview: {str(preview_error)}")
-                # Continue without link preview if it fails
-                pass
+            new_post.preview_status = 'pending'
         
         db.session.add(new_post)
         db.session.commit()
+        if new_post.preview_status == 'pending':
+            schedule_link_previews(Post, [(new_post.id, new_post.url)])
         
         user = User.query.get(1)  # Temporary default user ID
         
@@ -569,7 +1688,8 @@ def create_post(timeline_id):
             'url': new_post.url,
             'url_title': new_post.url_title,
             'url_description': new_post.url_description,
-                    'url_image': new_post.url_image,
+            'url_image': new_post.url_image,
+            'preview_status': new_post.preview_status,
             'created_by': new_post.created_by,
             'created_at': new_post.created_at.isoformat(),
             'upvotes': new_post.upvotes,
@@ -612,32 +1732,27 @@ def create_post_without_timeline():
             image=image  # Add the image URL to the post
         )
 
-        # If URL is provided, fetch preview data
+        # If URL is provided, its preview is fetched in the background once the post is saved
         if url:
-            preview_data = get_link_preview(url)
-            if preview_data:
-                new_post.url_title = preview_data.get('title')
-                new_post.url_description = preview_data.get('description')
-                new_post.url_image = preview_data.get('image')
-
-        db.session.add(new_post)
-        db.session.commit()
+            new_post.preview_status = 'pending'
 
-        # Add tags
-        for tag_name in tags:
-            tag = Tag.query.filter(db.func.lower(Tag.name) == tag_name.lower()).first()
-            if not tag:
-                tag = Tag(name=tag_name.lower())
-                db.session.add(tag)
-            
-            post_tag = PostTag(post_id=new_post.id, tag_id=tag.id)
-            db.session.add(post_tag)
+        # Add tags (posts don't create tag timelines)
+        try:
+            tag_names = clean_tag_names(tags)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        resolved_tags = resolve_tags(tag_names, current_user_id, with_timelines=False)
+        new_post.tags.extend(resolved_tags[tag_name] for tag_name in tag_names)
 
+        db.session.add(new_post)
         db.session.commit()
+        if new_post.preview_status == 'pending':
+            schedule_link_previews(Post, [(new_post.id, new_post.url)])
 
         return jsonify({
             'message': 'Post created successfully',
-            'post_id': new_post.id
+            'post_id': new_post.id,
+            'preview_status': new_post.preview_status
         }), 201
 
     except Exception as e:
@@ -645,64 +1760,121 @@ def create_post_without_timeline():
         app.logger.error(f"Error creating post: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Sort orders of the posts feed, each backed by a (column, id) index on Post
+POST_FEED_SORTS = {
+    'newest': 'created_at',
+    'popular': 'upvotes',
+    'promoted': 'promotion_score',
+}
+
+# Page sizes for the posts feed
+DEFAULT_POST_PAGE_SIZE = 10
+MAX_POST_PAGE_SIZE = 100
+
+def encode_post_cursor(post, sort_by):
+    """Build the opaque cursor pointing just past the given post in a feed sort order."""
+    value = getattr(post, POST_FEED_SORTS[sort_by])
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([value, post.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_post_cursor(cursor, sort_by):
+    """
+    Decode a cursor produced by encode_post_cursor for the same sort order.
+
+    Returns:
+        A (sort value, post_id) tuple
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, post_id = json.loads(base64.urlsafe_b64decode(padded))
+        if sort_by == 'newest':
+            value = datetime.fromisoformat(value)
+        elif sort_by == 'popular':
+            value = int(value)
+        else:
+            value = float(value)
+        return value, int(post_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Malformed cursor')
+
+def apply_post_keyset(query, sort_by, cursor, limit):
+    """
+    Order a Post query by a feed sort order and fetch the page after the cursor.
+
+    Seeks on (sort column, id) like apply_event_keyset, so deep pages cost
+    the same index range scan as the first one.
+    """
+    column = getattr(Post, POST_FEED_SORTS[sort_by])
+    if cursor is not None:
+        cursor_value, cursor_id = cursor
+        query = query.filter(db.or_(
+            column < cursor_value,
+            db.and_(column == cursor_value, Post.id < cursor_id)
+        ))
+    return query.order_by(column.desc(), Post.id.desc()).limit(limit)
+
 @app.route('/api/posts', methods=['GET'])
 def get_all_posts():
     try:
-        # Get query parameters for pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
         sort_by = request.args.get('sort', 'newest')  # 'newest', 'popular', 'promoted'
+        if sort_by not in POST_FEED_SORTS:
+            return jsonify({'error': f"sort must be one of: {', '.join(POST_FEED_SORTS)}"}), 400
 
         # Base query with joins to get timeline and user information
         query = db.session.query(Post, Timeline, User)\
             .join(Timeline, Post.timeline_id == Timeline.id)\
             .join(User, Post.created_by == User.id)
 
-        # Apply sorting
-        if sort_by == 'newest':
-            query = query.order_by(Post.created_at.desc())
-        elif sort_by == 'popular':
-            query = query.order_by(Post.upvotes.desc())
-        elif sort_by == 'promoted':
-            query = query.order_by(Post.promotion_score.desc())
-
-        # Execute paginated query
-        paginated_posts = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        # Format the response
-        posts = []
-        for post, timeline, user in paginated_posts.items:
-            posts.append({
-                'id': post.id,
-                'title': post.title,
-                'content': post.content,
-                'event_date': post.event_date.isoformat(),
-                'created_at': post.created_at.isoformat(),
-                'upvotes': post.upvotes,
-                'url': post.url,
-                'url_title': post.url_title,
-                'url_description': post.url_description,
-                'url_image': post.url_image,
-                'timeline': {
-                    'id': timeline.id,
-                    'name': timeline.name,
-                },
-                'author': {
-                    'id': user.id,
-                    'username': user.username,
-                    'avatar_url': user.avatar_url
-                },
-                'comment_count': len(post.comments)
-            })
+        # Counting every matching post dominates latency on deep pages, so
+        # keyset clients only pay for it when they ask
+        keyset = 'limit' in request.args or 'cursor' in request.args
+        include_total = request.args.get('include_total', '' if keyset else 'true').lower() in ('1', 'true', 'yes')
+        total = query.order_by(None).count() if include_total else None
 
-        return jsonify({
-            'posts': posts,
-            'total': paginated_posts.total,
-            'pages': paginated_posts.pages,
-            'current_page': page,
-            'has_next': paginated_posts.has_next,
-            'has_prev': paginated_posts.has_prev
-        }), 200
+        if keyset:
+            limit = request.args.get('limit', DEFAULT_POST_PAGE_SIZE, type=int)
+            limit = max(1, min(limit, MAX_POST_PAGE_SIZE))
+            try:
+                cursor = decode_post_cursor(request.args['cursor'], sort_by) if request.args.get('cursor') else None
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            # Fetch one extra row to learn whether another page follows
+            rows = apply_post_keyset(query, sort_by, cursor, limit + 1).all()
+            has_next = len(rows) > limit
+            rows = rows[:limit]
+        else:
+            page = max(1, request.args.get('page', 1, type=int))
+            per_page = max(1, min(request.args.get('per_page', DEFAULT_POST_PAGE_SIZE, type=int), MAX_POST_PAGE_SIZE))
+            rows = apply_post_keyset(query, sort_by, None, per_page + 1).offset((page - 1) * per_page).all()
+            has_next = len(rows) > per_page
+            rows = rows[:per_page]
+
+        posts = [serialize_post(post, timeline=timeline, author=user) for post, timeline, user in rows]
+
+        if keyset:
+            response = {
+                'posts': posts,
+                'next_cursor': encode_post_cursor(rows[-1][0], sort_by) if has_next else None,
+                'has_next': has_next
+            }
+            if include_total:
+                response['total'] = total
+        else:
+            response = {
+                'posts': posts,
+                'current_page': page,
+                'has_next': has_next,
+                'has_prev': page > 1
+            }
+            if include_total:
+                response['total'] = total
+                response['pages'] = -(-total // per_page)
+        return json_response(response)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -732,6 +1904,7 @@ def check_timeline_promotions(timeline_id):
                     url_title=post.url_title,
                     url_description=post.url_description,
                     url_image=post.url_image,
+                    preview_status=post.preview_status,
                     timeline_id=timeline_id,
                     created_by=post.created_by,
                     created_at=datetime.now(),
@@ -762,17 +1935,22 @@ def check_timeline_promotions(timeline_id):
 @app.route('/api/post/<int:post_id>/promote-vote', methods=['POST'])
 def vote_for_promotion(post_id):
     try:
-        post = Post.query.get_or_404(post_id)
-        post.promotion_votes += 1
-        post.update_promotion_score()
-        db.session.commit()
+        # Votes for unknown posts would be buffered and then silently match no row
+        if not post_exists(post_id):
+            return jsonify({
+                'success': False,
+                'error': 'Post not found'
+            }), 404
+            
+        # Buffered and applied in batches, so a post going viral doesn't
+        # turn into one locked row-update per vote
+        pending = promotion_vote_buffer.add(post_id)
         
         return jsonify({
             'success': True,
-            'new_score': post.promotion_score
-        }), 200
+            'pending_votes': pending
+        }), 202
     except Exception as e:
-        db.session.rollback()
         return jsonify({
             'success': False,
             'error': str(e)
@@ -884,17 +2062,37 @@ def delete_timeline(timeline_id):
         # Get all events that are directly in this timeline
         direct_events = Event.query.filter_by(timeline_id=timeline_id).all()
         
+        # Timelines referencing these events will show a different origin for them
+        bump_timeline_versions({
+            referencing_timeline.id
+            for event in direct_events
+            for referencing_timeline in event.referenced_in
+            if referencing_timeline.id != timeline.id
+        })
+        
         # For each direct event, remove it from the timeline
+        reference_deltas = {}
+        tag_deltas = {}
         for event in direct_events:
             # If the event is referenced in other timelines, just remove it from this one
             if event.referenced_in:
                 # Keep the event, but change its primary timeline to one of its references
                 event.timeline_id = event.referenced_in[0].id
-                # Remove this timeline from its references
-                event.referenced_in.remove(timeline)
+                # Remove this timeline from its references, if it is one
+                if timeline in event.referenced_in:
+                    event.referenced_in.remove(timeline)
+                    reference_deltas[event.id] = reference_deltas.get(event.id, 0) - 1
             else:
-                # If the event is not referenced elsewhere, delete it
+                # If the event is not referenced elsewhere, delete it (and its tag links)
+                for tag in event.tags:
+                    tag_deltas[tag.id] = tag_deltas.get(tag.id, 0) - 1
                 db.session.delete(event)
+        increment_counters(Event.reference_count, reference_deltas)
+        increment_counters(Tag.event_count, tag_deltas)
+        
+        # Other timelines' events stop referencing this one
+        db.session.flush()
+        release_timeline_references(timeline.id)
         
         # Find tags associated with this timeline
         associated_tags = Tag.query.filter_by(timeline_id=timeline_id).all()
@@ -903,6 +2101,9 @@ def delete_timeline(timeline_id):
         for tag in associated_tags:
             tag.timeline_id = None
         
+        # Drop the timeline's rollups (events moved elsewhere were already counted there)
+        clear_timeline_rollups([timeline.id])
+        
         # Delete the timeline
         db.session.delete(timeline)
         db.session.commit()
@@ -938,6 +2139,43 @@ def merge_timelines():
         # Move all posts from source to target timeline
         Post.query.filter_by(timeline_id=source_timeline.id).update({'timeline_id': target_timeline.id})
         
+        # Timelines referencing the source's events will show a new origin for them
+        source_event_ids = db.select(Event.id).where(Event.timeline_id == source_timeline.id)
+        referencing_timeline_ids = db.session.execute(
+            db.select(event_timeline_refs.c.timeline_id).distinct()
+            .where(event_timeline_refs.c.event_id.in_(source_event_ids))
+        ).scalars().all()
+        bump_timeline_versions(set(referencing_timeline_ids) | {target_timeline.id})
+        
+        # Move the source's events and references too, skipping events the target already references
+        Event.query.filter_by(timeline_id=source_timeline.id).update({'timeline_id': target_timeline.id})
+        target_refs = db.select(event_timeline_refs.c.event_id).where(
+            event_timeline_refs.c.timeline_id == target_timeline.id
+        )
+        # Events referencing both timelines end up with one reference fewer
+        doubly_referenced_ids = db.session.execute(
+            db.select(event_timeline_refs.c.event_id)
+            .where(event_timeline_refs.c.timeline_id == source_timeline.id)
+            .where(event_timeline_refs.c.event_id.in_(target_refs))
+        ).scalars().all()
+        reference_deltas = {}
+        for event_id in doubly_referenced_ids:
+            reference_deltas[event_id] = reference_deltas.get(event_id, 0) - 1
+        increment_counters(Event.reference_count, reference_deltas)
+        db.session.execute(
+            event_timeline_refs.update()
+            .where(event_timeline_refs.c.timeline_id == source_timeline.id)
+            .where(event_timeline_refs.c.event_id.not_in(target_refs))
+            .values(timeline_id=target_timeline.id)
+        )
+        db.session.execute(
+            event_timeline_refs.delete().where(event_timeline_refs.c.timeline_id == source_timeline.id)
+        )
+        
+        # Recount the target and drop the source's rollups
+        clear_timeline_rollups([source_timeline.id])
+        rebuild_timeline_rollups([target_timeline.id])
+        
         # Delete the source timeline
         db.session.delete(source_timeline)
         db.session.commit()
@@ -1070,7 +2308,7 @@ def refresh():
             current_user_id = get_jwt_identity()
             
             # Get user and create new access token
-            user = User.query.get(current_user_id)
+            user = get_user_summary(current_user_id)
             if not user:
                 return jsonify({'error': 'User not found'}), 404
 
@@ -1089,12 +2327,16 @@ def refresh():
 @jwt_required()
 def logout():
     try:
-        jti = get_jwt()["jti"]
+        token = get_jwt()
+        jti = token["jti"]
         user_id = get_jwt_identity()
         
-        token_block = TokenBlocklist(jti=jti, user_id=user_id)
+        # Keep the row only as long as the token itself would have been valid
+        expires_at = datetime.fromtimestamp(token["exp"], timezone.utc).replace(tzinfo=None) if "exp" in token else None
+        token_block = TokenBlocklist(jti=jti, user_id=user_id, expires_at=expires_at)
         db.session.add(token_block)
         db.session.commit()
+        remember_revoked_token(jti)
         
         return jsonify({'message': 'Successfully logged out'}), 200
     except Exception as e:
@@ -1107,7 +2349,7 @@ def logout():
 def validate_token():
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = get_user_summary(current_user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
             
@@ -1131,6 +2373,7 @@ def update_profile():
         user = User.query.get(current_user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
+        old_author = (user.username, user.avatar_url)
 
         # Handle file upload
         if 'avatar' in request.files:
@@ -1158,7 +2401,11 @@ def update_profile():
         if 'bio' in form_data:
             user.bio = form_data['bio']
 
+        # Cached responses embedding this user as an author must be rebuilt
+        if (user.username, user.avatar_url) != old_author:
+            bump_timeline_versions(user_timeline_ids(user.id))
         db.session.commit()
+        user_summary_cache.delete(user.id)
         
         return jsonify({
             'id': user.id,
@@ -1173,15 +2420,20 @@ def update_profile():
         return jsonify({'error': 'Failed to update profile'}), 500
 
 @app.route('/api/timeline-v3', methods=['GET'])
+@cache_by_version(timeline_list_version_key)
 def get_timelines_v3():
     try:
-        timelines = Timeline.query.order_by(Timeline.created_at.desc()).all()
+        # Event counts and date ranges come from the rollup stats, not the event table
+        timelines = db.session.query(Timeline, TimelineStats)\
+            .outerjoin(TimelineStats, TimelineStats.timeline_id == Timeline.id)\
+            .order_by(Timeline.created_at.desc()).all()
         return jsonify([{
             'id': timeline.id,
             'name': timeline.name,
             'description': timeline.description,
-            'created_at': timeline.created_at.isoformat()
-        } for timeline in timelines])
+            'created_at': timeline.created_at.isoformat(),
+            **timeline_stats_json(stats)
+        } for timeline, stats in timelines])
         
     except Exception as e:
         app.logger.error(f'Error fetching timelines: {str(e)}')
@@ -1202,14 +2454,13 @@ def create_timeline_v3():
         if not data.get('name'):
             return jsonify({'error': 'Timeline name is required'}), 400
             
-        # Check if a timeline with this name already exists for the user
-        existing_timeline = Timeline.query.filter_by(
-            name=data['name'],
-            created_by=current_user_id
-        ).first()
+        # Check if a timeline with this name already exists (names are unique ignoring case)
+        existing_timeline = Timeline.query.filter_by(name_key=normalize_name(data['name'])).first()
         
         if existing_timeline:
-            return jsonify({'error': 'You already have a timeline with this name'}), 400
+            if str(existing_timeline.created_by) == str(current_user_id):
+                return jsonify({'error': 'You already have a timeline with this name'}), 400
+            return jsonify({'error': 'A timeline with this name already exists'}), 400
             
         new_timeline = Timeline(
             name=data['name'],
@@ -1219,6 +2470,7 @@ def create_timeline_v3():
         
         db.session.add(new_timeline)
         db.session.commit()
+        autocomplete_index.add('timeline', new_timeline.id, new_timeline.name)
         
         logger.info(f"Timeline created successfully: {new_timeline.id}")
         
@@ -1236,21 +2488,247 @@ def create_timeline_v3():
         return jsonify({'error': error_msg}), 500
 
 @app.route('/api/timeline-v3/<int:timeline_id>', methods=['GET'])
+@cache_by_version(timeline_version_key)
 def get_timeline_v3(timeline_id):
     try:
         timeline = Timeline.query.get_or_404(timeline_id)
+        
+        # Per-type totals are the sum of the (few) yearly rollup rows
+        type_counts = db.session.query(TimelineRollup.type, db.func.sum(TimelineRollup.event_count))\
+            .filter_by(timeline_id=timeline.id, granularity='year')\
+            .group_by(TimelineRollup.type).all()
+        
         return jsonify({
             'id': timeline.id,
             'name': timeline.name,
             'description': timeline.description,
             'created_by': timeline.created_by,
-            'created_at': timeline.created_at.isoformat()
+            'created_at': timeline.created_at.isoformat(),
+            **timeline_stats_json(TimelineStats.query.get(timeline.id)),
+            'type_counts': {event_type: int(count) for event_type, count in type_counts}
         })
     except Exception as e:
         app.logger.error(f'Error fetching timeline: {str(e)}')
         return jsonify({'error': 'Failed to fetch timeline'}), 500
 
+# View modes the timeline-v3 frontend can request a window for
+EVENT_WINDOW_VIEWS = ('day', 'week', 'month', 'year')
+
+def parse_query_datetime(value):
+    """
+    Parse an ISO 8601 query parameter into a naive UTC datetime.
+
+    Event dates are stored as naive UTC values (the frontend sends
+    toISOString() output), so aware inputs are converted before the
+    tzinfo is dropped.
+    """
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def get_event_window(args):
+    """
+    Work out the [start, end) event_date window requested by a client.
+
+    Accepts either explicit ``start``/``end`` ISO timestamps or a ``view``
+    (day, week, month, year) plus an optional ``anchor`` timestamp. The
+    view is aligned in the anchor's own UTC offset, so a browser sending
+    its local time gets the same day/week/month boundaries it renders.
+
+    Args:
+        args: The request's query arguments
+
+    Returns:
+        A (start, end) tuple of naive UTC datetimes; either may be None
+
+    Raises:
+        ValueError: If a timestamp or the view name is invalid
+    """
+    view = args.get('view')
+    if view:
+        if view not in EVENT_WINDOW_VIEWS:
+            raise ValueError(f"view must be one of: {', '.join(EVENT_WINDOW_VIEWS)}")
+
+        anchor_str = args.get('anchor')
+        if anchor_str:
+            anchor = datetime.fromisoformat(anchor_str.replace('Z', '+00:00'))
+        else:
+            anchor = datetime.now(timezone.utc)
+        if anchor.tzinfo is None:
+            anchor = anchor.replace(tzinfo=timezone.utc)
+
+        day_start = anchor.replace(hour=0, minute=0, second=0, microsecond=0)
+        if view == 'day':
+            start = day_start
+            end = start + timedelta(days=1)
+        elif view == 'week':
+            # Weeks start on Sunday, matching JavaScript's Date.getDay()
+            start = day_start - timedelta(days=(day_start.weekday() + 1) % 7)
+            end = start + timedelta(days=7)
+        elif view == 'month':
+            start = day_start.replace(day=1)
+            if start.month == 12:
+                end = start.replace(year=start.year + 1, month=1)
+            else:
+                end = start.replace(month=start.month + 1)
+        else:
+            start = day_start.replace(month=1, day=1)
+            end = start.replace(year=start.year + 1)
+
+        return (
+            start.astimezone(timezone.utc).replace(tzinfo=None),
+            end.astimezone(timezone.utc).replace(tzinfo=None)
+        )
+
+    start = parse_query_datetime(args['start']) if args.get('start') else None
+    end = parse_query_datetime(args['end']) if args.get('end') else None
+    if start and end and start >= end:
+        raise ValueError('start must be before end')
+    return start, end
+
+def event_window_state():
+    """
+    Cache state of the requested event window (see cache_by_version).
+
+    A ``view`` without an ``anchor`` is relative to the current time, so
+    the concrete window it resolves to becomes part of the ETag; a cached
+    response then stops matching once the day, week, month or year rolls
+    over.
+    """
+    if not request.args.get('view') or request.args.get('anchor'):
+        return ''
+    try:
+        start, end = get_event_window(request.args)
+    except ValueError:
+        # The view answers with a 400, which is never cached
+        return ''
+    return f'{start.isoformat()}/{end.isoformat()}'
+
+def apply_event_window(query, start, end):
+    """Restrict an Event query to start <= event_date < end."""
+    if start is not None:
+        query = query.filter(Event.event_date >= start)
+    if end is not None:
+        query = query.filter(Event.event_date < end)
+    return query
+
+# Page sizes for cursor-paginated event reads
+DEFAULT_EVENT_PAGE_SIZE = 100
+MAX_EVENT_PAGE_SIZE = 500
+
+def encode_event_cursor(event):
+    """Build the opaque cursor pointing just past the given event."""
+    payload = json.dumps([event.event_date.isoformat(), event.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_event_cursor(cursor):
+    """
+    Decode a cursor produced by encode_event_cursor.
+
+    Returns:
+        An (event_date, event_id) tuple
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        event_date_str, event_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(event_date_str), int(event_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Malformed cursor')
+
+def apply_event_keyset(query, cursor, limit):
+    """
+    Order an Event query newest first and fetch the page after the cursor.
+
+    Seeks on (event_date, id) instead of using OFFSET, so every page costs
+    the same index range scan however deep the client has scrolled.
+    """
+    if cursor is not None:
+        cursor_date, cursor_id = cursor
+        query = query.filter(db.or_(
+            Event.event_date < cursor_date,
+            db.and_(Event.event_date == cursor_date, Event.id < cursor_id)
+        ))
+    return query.order_by(Event.event_date.desc(), Event.id.desc()).limit(limit)
+
+def timeline_events_query(timeline_id):
+    """
+    Query every event in a timeline, whether it lives there or is referenced.
+
+    Both sources are matched in a single WHERE clause, so an event that is
+    direct and referenced at the same time comes back once, and ordering,
+    windows and pagination can all be applied by the database.
+    """
+    referenced_event_ids = db.select(event_timeline_refs.c.event_id).where(
+        event_timeline_refs.c.timeline_id == timeline_id
+    )
+    return Event.query.filter(db.or_(
+        Event.timeline_id == timeline_id,
+        Event.id.in_(referenced_event_ids)
+    ))
+
+# Event types understood by the timeline-v3 frontend (see EventTypes.js)
+EVENT_TYPES = ('remark', 'news', 'media')
+
+def get_list_arg(args, name):
+    """Read a query parameter given repeatedly and/or as a comma-separated list."""
+    values = []
+    for raw_value in args.getlist(name):
+        values.extend(value.strip() for value in raw_value.split(',') if value.strip())
+    return values
+
+def apply_event_filters(query, args):
+    """
+    Apply the timeline-v3 event filters to an Event query.
+
+    Every filter compiles to SQL, so only matching rows leave the database:
+        tag: One or more tag names (case-insensitive)
+        tag_match: 'any' (default) or 'all' of the given tags
+        type: One or more of EVENT_TYPES
+        created_by: One or more user IDs
+    Date ranges are handled separately by get_event_window.
+
+    Raises:
+        ValueError: If a filter value is invalid
+    """
+    tag_names = {normalize_name(name) for name in get_list_arg(args, 'tag')}
+    if tag_names:
+        tag_match = args.get('tag_match', 'any')
+        if tag_match not in ('any', 'all'):
+            raise ValueError("tag_match must be 'any' or 'all'")
+        
+        tagged_event_ids = db.select(event_tags.c.event_id)\
+            .join(Tag, Tag.id == event_tags.c.tag_id)\
+            .where(Tag.name_key.in_(tag_names))
+        if tag_match == 'all':
+            # Keep only events carrying every requested tag
+            tagged_event_ids = tagged_event_ids\
+                .group_by(event_tags.c.event_id)\
+                .having(db.func.count(db.distinct(Tag.name_key)) == len(tag_names))
+        query = query.filter(Event.id.in_(tagged_event_ids))
+    
+    event_types = get_list_arg(args, 'type')
+    if event_types:
+        invalid_types = set(event_types) - set(EVENT_TYPES)
+        if invalid_types:
+            raise ValueError(f"Unknown event type: {', '.join(sorted(invalid_types))}")
+        query = query.filter(Event.type.in_(event_types))
+    
+    creator_ids = get_list_arg(args, 'created_by')
+    if creator_ids:
+        try:
+            creator_ids = [int(creator_id) for creator_id in creator_ids]
+        except ValueError:
+            raise ValueError('created_by must be a user ID')
+        query = query.filter(Event.created_by.in_(creator_ids))
+    
+    return query
+
 @app.route('/api/timeline-v3/<timeline_id>/events', methods=['GET'])
+@cache_by_version(timeline_version_key, request_state=event_window_state)
 def get_timeline_v3_events(timeline_id):
     try:
         # Get timeline
@@ -1258,105 +2736,348 @@ def get_timeline_v3_events(timeline_id):
         if not timeline:
             return jsonify({'error': 'Timeline not found'}), 404
             
-        # Get all events directly in this timeline
-        direct_events = Event.query.filter_by(timeline_id=timeline_id).all()
+        # Get the requested date window (defaults to the whole timeline)
+        try:
+            window_start, window_end = get_event_window(request.args)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date window: {str(e)}'}), 400
+            
+        # Paginate only when asked to, so existing clients still get the full window
+        paginate = 'limit' in request.args or 'cursor' in request.args
+        if paginate:
+            limit = request.args.get('limit', DEFAULT_EVENT_PAGE_SIZE, type=int)
+            limit = max(1, min(limit, MAX_EVENT_PAGE_SIZE))
+            try:
+                cursor = decode_event_cursor(request.args['cursor']) if request.args.get('cursor') else None
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+        # Get the fields the client asked for (all of them by default)
+        try:
+            fields = parse_fields(request.args.get('fields'), EVENT_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        include_tags = 'tags' in fields
         
-        # Get all events that reference this timeline
-        referenced_events = timeline.referenced_events.all()
+        # Get the related records to embed (none by default)
+        try:
+            include = parse_include(request.args.get('include'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Combine both sets of events
-        all_events = direct_events + referenced_events
+        # Rows are one object per event; columnar sends one array per field
+        shape = request.args.get('shape', 'rows')
+        if shape not in ('rows', 'columnar'):
+            return jsonify({'error': "shape must be 'rows' or 'columnar'"}), 400
+            
+        # Get direct and referenced events within the window in one query
+        # (tags are batch-loaded with one extra query instead of one per event)
+        events_query = apply_event_window(timeline_events_query(timeline.id), window_start, window_end)
+        if include_tags:
+            events_query = events_query.options(selectinload(Event.tags))
         
-        # Get tag filter from query parameters
-        tag_filter = request.args.get('tag')
+        # Apply tag, type and creator filters in the same query
+        try:
+            events_query = apply_event_filters(events_query, request.args)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid filter: {str(e)}'}), 400
         
-        # If tag filter is provided, filter events by tag
-        if tag_filter:
-            # Handle case-insensitive matching
-            tag_filter = tag_filter.lower()
-            
-            # Try to find the tag (case insensitive)
-            tag = Tag.query.filter(db.func.lower(Tag.name) == tag_filter).first()
-            
-            if tag:
-                # Filter events that have this tag
-                filtered_events = []
-                for event in all_events:
-                    for event_tag in event.tags:
-                        if db.func.lower(event_tag.name) == tag_filter:
-                            filtered_events.append(event)
-                            break
-                all_events = filtered_events
-            else:
-                # If tag doesn't exist, return empty list
-                all_events = []
+        # Fetch one extra row to know whether another page exists
+        if paginate:
+            events_query = apply_event_keyset(events_query, cursor, limit + 1)
+        else:
+            events_query = events_query.order_by(Event.event_date.desc(), Event.id.desc())
+        
+        all_events = events_query.all()
+        
+        # Trim the extra lookahead row off the page
+        if paginate:
+            has_next = len(all_events) > limit
+            all_events = all_events[:limit]
+        
+        # Batch-load the original timelines of referenced events
+        original_timeline_ids = set()
+        if include_tags:
+            original_timeline_ids = {event.timeline_id for event in all_events if event.timeline_id != timeline.id}
+        original_timelines = {}
+        if original_timeline_ids:
+            original_timelines = {
+                original_timeline.id: original_timeline
+                for original_timeline in Timeline.query.filter(Timeline.id.in_(original_timeline_ids))
+            }
         
-        # Sort events by event_date
-        all_events.sort(key=lambda x: x.event_date, reverse=True)
+        # Batch-load the tags named after those timelines (a read never
+        # creates them; timelines without one get a tag entry with no ID)
+        original_tags = {}
+        if original_timelines:
+            original_tag_names = {original_timeline.name_key for original_timeline in original_timelines.values()}
+            for original_tag in Tag.query.filter(Tag.name_key.in_(original_tag_names)):
+                original_tags[original_tag.name_key] = original_tag
         
-        # Convert events to JSON
-        events_json = []
+        # Build each event's tag list
+        tag_lists = []
         for event in all_events:
-            # Get tags for this event
-            tags = [{'id': tag.id, 'name': tag.name} for tag in event.tags]
-            
-            # Add the original timeline's tag if viewing from a different timeline
-            if event.timeline_id != int(timeline_id):
-                original_timeline = Timeline.query.get(event.timeline_id)
+            tags = None
+            if include_tags:
+                # Get tags for this event
+                tags = [serialize_tag(tag) for tag in event.tags]
+                
+                # Add the original timeline's tag if viewing from a different timeline
+                original_timeline = original_timelines.get(event.timeline_id)
                 if original_timeline:
-                    # Check if the original timeline's tag is already in the list
-                    original_tag_name = original_timeline.name.lower()
-                    tag_exists = False
-                    for tag in tags:
-                        if tag['name'].lower() == original_tag_name:
-                            tag_exists = True
-                            break
-                    
-                    # Add the original timeline's tag if it's not already there
-                    if not tag_exists:
-                        # Find or create a tag for the original timeline
-                        original_tag = Tag.query.filter(db.func.lower(Tag.name) == original_tag_name).first()
-                        if not original_tag:
-                            original_tag = Tag(
-                                name=original_tag_name,
-                                timeline_id=original_timeline.id
-                            )
-                            db.session.add(original_tag)
-                            db.session.flush()
-                        
-                        # Add the tag to the event's tags list
+                    # Add the original timeline's tag if it's not already in the list
+                    original_tag_name = original_timeline.name_key
+                    if not any(normalize_name(tag['name']) == original_tag_name for tag in tags):
+                        original_tag = original_tags.get(original_tag_name)
                         tags.append({
-                            'id': original_tag.id,
-                            'name': original_tag.name,
+                            'id': original_tag.id if original_tag else None,
+                            'name': original_tag.name if original_tag else original_tag_name,
                             'is_original_timeline': True  # Flag to identify this as the original timeline
                         })
-            
-            # Create event JSON
-            event_json = {
-                'id': event.id,
-                'title': event.title,
-                'description': event.description,
-                'event_date': event.event_date.isoformat(),
-                'type': event.type,
-                'url': event.url,
-                'url_title': event.url_title,
-                'url_description': event.url_description,
-                'url_image': event.url_image,
-                'media_url': event.media_url,
-                'media_type': event.media_type,
-                'timeline_id': event.timeline_id,
-                'created_by': event.created_by,
-                'created_at': event.created_at.isoformat(),
-                'tags': tags
-            }
-            events_json.append(event_json)
+            tag_lists.append(tags)
         
-        return jsonify(events_json), 200
+        # Authors come from the user summary cache, loading any misses in one query
+        # The body is cached under the timeline version, so authors must be current
+        authors = author_payloads(all_events, use_cache=False) if 'author' in include else None
+        
+        # Convert events to the requested shape
+        if shape == 'columnar':
+            events_json = serialize_events_columnar(all_events, fields, tag_lists if include_tags else None, authors)
+        else:
+            events_json = [
+                serialize_event(event, fields, tags, author)
+                for event, tags, author in zip(all_events, tag_lists, authors or [None] * len(all_events))
+            ]
+        
+        if paginate:
+            return negotiated_response({
+                'events': events_json,
+                'next_cursor': encode_event_cursor(all_events[-1]) if has_next else None,
+                'has_next': has_next
+            })
+            
+        return negotiated_response(events_json)
         
     except Exception as e:
         app.logger.error(f'Error getting timeline events: {str(e)}')
         return jsonify({'error': f'Failed to get timeline events: {str(e)}'}), 500
 
+def pick_rollup_granularity(bucket, tz, window_start, window_end, first_event_date=None, last_event_date=None):
+    """
+    Choose the rollup granularity that can answer a histogram exactly.
+
+    Rollups are bucketed in UTC, so a coarser rollup only matches a UTC
+    histogram; other zones are rebuilt from hourly rollups as long as their
+    offset is a whole number of hours throughout the histogram's range
+    (the window, or the timeline's events where it's open-ended). The
+    window edges must also fall on the rollup's bucket boundaries.
+
+    Returns:
+        A granularity from ROLLUP_GRANULARITIES, or None if the events have
+        to be read directly
+    """
+    edges = [edge for edge in (window_start, window_end) if edge is not None]
+    if tz is not timezone.utc:
+        range_start = window_start or first_event_date
+        range_end = window_end or last_event_date
+        if range_start is None or range_end is None or has_fractional_offset(tz, range_start, range_end):
+            return None
+    
+    candidates = ROLLUP_GRANULARITIES[:ROLLUP_GRANULARITIES.index(bucket) + 1]
+    for granularity in reversed(candidates):
+        if granularity != 'hour' and tz is not timezone.utc:
+            continue
+        if all(rollup_bucket_start(edge, granularity) == edge for edge in edges):
+            return granularity
+    return None
+
+@app.route('/api/timeline-v3/<timeline_id>/histogram', methods=['GET'])
+@cache_by_version(timeline_version_key, request_state=event_window_state)
+def get_timeline_v3_histogram(timeline_id):
+    try:
+        # Get timeline
+        timeline = Timeline.query.get(timeline_id)
+        if not timeline:
+            return jsonify({'error': 'Timeline not found'}), 404
+            
+        bucket = request.args.get('bucket', 'day')
+        if bucket not in BUCKET_SIZES:
+            return jsonify({'error': f"bucket must be one of: {', '.join(BUCKET_SIZES)}"}), 400
+        by_type = request.args.get('by_type', '').lower() in ('1', 'true', 'yes')
+        
+        # Accept the same window and filters as the events endpoint
+        try:
+            tz = get_timezone(request.args.get('tz'))
+            window_start, window_end = get_event_window(request.args)
+            events_query = apply_event_filters(
+                apply_event_window(timeline_events_query(timeline.id), window_start, window_end),
+                request.args
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+            
+        response = {
+            'bucket': bucket,
+            'tz': request.args.get('tz') or 'UTC',
+            'total': 0,
+            'buckets': []
+        }
+        
+        # Tag and creator filters need the events themselves; everything else
+        # is answered from the pre-aggregated rollups
+        granularity = None
+        if not get_list_arg(request.args, 'tag') and not get_list_arg(request.args, 'created_by'):
+            stats = TimelineStats.query.get(timeline.id)
+            granularity = pick_rollup_granularity(
+                bucket, tz, window_start, window_end,
+                stats.first_event_date if stats else None, stats.last_event_date if stats else None
+            )
+        
+        if granularity:
+            if not stats or not stats.event_count:
+                return jsonify(response), 200
+                
+            rollup_query = TimelineRollup.query.filter_by(timeline_id=timeline.id, granularity=granularity)
+            if window_start is not None:
+                rollup_query = rollup_query.filter(TimelineRollup.bucket_start >= window_start)
+            if window_end is not None:
+                rollup_query = rollup_query.filter(TimelineRollup.bucket_start < window_end)
+            event_types = get_list_arg(request.args, 'type')
+            if event_types:
+                rollup_query = rollup_query.filter(TimelineRollup.type.in_(event_types))
+            rows = rollup_query.with_entities(
+                TimelineRollup.bucket_start, TimelineRollup.type, TimelineRollup.event_count
+            ).all()
+            weights = [row[2] for row in rows]
+            
+            # Default the range to the timeline's first and last events
+            range_start = window_start or stats.first_event_date
+            range_end = window_end or stats.last_event_date + timedelta(microseconds=1)
+        else:
+            # Only the timestamp and type columns leave the database
+            rows = events_query.with_entities(Event.event_date, Event.type).all()
+            weights = None
+            
+            # Default the range to the span of the matching events
+            if rows:
+                range_start = window_start or min(row[0] for row in rows)
+                range_end = window_end or max(row[0] for row in rows) + timedelta(microseconds=1)
+            
+        if not rows:
+            return jsonify(response), 200
+            
+        try:
+            local_starts, edges = bucket_boundaries(range_start, range_end, bucket, tz)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+            
+        totals, breakdown = bucket_counts(
+            [row[0] for row in rows], edges,
+            categories=[row[1] for row in rows] if by_type else None,
+            weights=weights
+        )
+        
+        # Only non-empty buckets are sent back
+        for position in totals.nonzero()[0]:
+            bucket_json = {
+                'start': local_starts[position].isoformat(),
+                'count': int(totals[position])
+            }
+            if by_type:
+                bucket_json['types'] = {
+                    event_type: int(counts[position])
+                    for event_type, counts in breakdown.items()
+                    if counts[position]
+                }
+            response['buckets'].append(bucket_json)
+        response['total'] = int(totals.sum())
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        app.logger.error(f'Error getting timeline histogram: {str(e)}')
+        return jsonify({'error': f'Failed to get timeline histogram: {str(e)}'}), 500
+
+# Events fetched per database round-trip (and per streamed chunk) during exports
+EXPORT_BATCH_SIZE = 500
+
+@app.route('/api/timeline-v3/<timeline_id>/export', methods=['GET'])
+@cache_by_version(timeline_version_key, cache_body=False, request_state=event_window_state)
+def export_timeline_v3(timeline_id):
+    try:
+        # Get timeline
+        timeline = Timeline.query.get(timeline_id)
+        if not timeline:
+            return jsonify({'error': 'Timeline not found'}), 404
+            
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+            
+        # Accept the same window, filters and projection as the events endpoint
+        try:
+            fields = parse_fields(request.args.get('fields'), EVENT_FIELDS)
+            window_start, window_end = get_event_window(request.args)
+            events_query = apply_event_filters(
+                apply_event_window(timeline_events_query(timeline.id), window_start, window_end),
+                request.args
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+            
+        include_tags = 'tags' in fields or export_format == 'ics'
+        if include_tags:
+            events_query = events_query.options(selectinload(Event.tags))
+            
+        # Stream oldest first through a server-side cursor, one batch at a time
+        events_query = events_query.order_by(Event.event_date, Event.id).yield_per(EXPORT_BATCH_SIZE)
+        timeline_name = timeline.name
+        
+        def generate():
+            # Send the preamble before the query runs so the download starts right away
+            if export_format == 'csv':
+                yield csv_chunk([fields]).encode()
+            elif export_format == 'ics':
+                yield ics_header(timeline_name).encode()
+                
+            chunk = []
+            for event in events_query:
+                tags = [serialize_tag(tag) for tag in event.tags] if include_tags else None
+                if export_format == 'ndjson':
+                    chunk.append(dumps(serialize_event(event, fields, tags)) + b'\n')
+                elif export_format == 'csv':
+                    row = serialize_event(event, fields, tags)
+                    if 'tags' in row:
+                        row['tags'] = ','.join(tag['name'] for tag in row['tags'])
+                    chunk.append(csv_chunk([row.values()]).encode())
+                else:
+                    chunk.append(ics_event(
+                        uid=f'event-{event.id}@timeline-forum',
+                        start=event.event_date,
+                        summary=event.title,
+                        description=event.description,
+                        url=event.url,
+                        categories=[tag['name'] for tag in tags]
+                    ).encode())
+                    
+                if len(chunk) >= EXPORT_BATCH_SIZE:
+                    yield b''.join(chunk)
+                    chunk = []
+                    
+            if export_format == 'ics':
+                chunk.append(ics_footer().encode())
+            if chunk:
+                yield b''.join(chunk)
+        
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        response = app.response_class(stream_with_context(generate()), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="timeline-{timeline.id}.{extension}"'
+        return response
+        
+    except Exception as e:
+        app.logger.error(f'Error exporting timeline: {str(e)}')
+        return jsonify({'error': f'Failed to export timeline: {str(e)}'}), 500
+
 @app.route('/api/timeline-v3/<timeline_id>/events', methods=['POST'])
 def create_timeline_v3_event(timeline_id):
     try:
@@ -1368,6 +3089,12 @@ def create_timeline_v3_event(timeline_id):
         if not all(key in data for key in ['title', 'event_date', 'type']):
             return jsonify({'error': 'Missing required fields'}), 400
             
+        # The route passes the ID as a string; timeline ID sets below must compare as ints
+        try:
+            timeline_id = int(timeline_id)
+        except ValueError:
+            return jsonify({'error': 'Timeline not found'}), 404
+            
         # Parse the event date from ISO format
         try:
             # Accept the date string exactly as provided by the frontend
@@ -1413,89 +3140,51 @@ def create_timeline_v3_event(timeline_id):
             new_event.url_title = data.get('url_title', '')
             new_event.url_description = data.get('url_description', '')
             new_event.url_image = data.get('url_image', '')
+            # Previews the client didn't fetch itself are filled in after the commit
+            new_event.preview_status = 'ok' if new_event.url_title else 'pending'
         
         # Handle optional media data
         if 'media_url' in data and data['media_url']:
             new_event.media_url = data['media_url']
             new_event.media_type = data.get('media_type', '')
             
-        # Handle tags
+        # Handle tags, resolving the whole list at once
         if 'tags' in data and data['tags']:
-            for tag_name in data['tags']:
-                # Clean tag name
-                tag_name = tag_name.strip().lower()
-                if not tag_name:
-                    continue
-                    
-                # Find or create tag (case insensitive)
-                tag = Tag.query.filter(db.func.lower(Tag.name) == tag_name).first()
-                if not tag:
-                    # Create new tag
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                    
-                    # Create a new timeline for this tag if it doesn't exist
-                    # First check for the capitalized version
-                    capitalized_tag_name = tag_name.upper()
-                    
-                    # Check for both normal and hashtag-prefixed versions (for backward compatibility)
-                    tag_timeline = Timeline.query.filter(
-                        db.or_(
-                            db.func.lower(Timeline.name) == tag_name,
-                            db.func.lower(Timeline.name) == f"#{tag_name}"
-                        )
-                    ).first()
-                    
-                    if not tag_timeline:
-                        # Create a new timeline with ALL CAPS name
-                        tag_timeline = Timeline(
-                            name=capitalized_tag_name,
-                            description=f"Timeline for #{tag_name}",
-                            created_by=1  # Temporary default user ID
-                        )
-                        db.session.add(tag_timeline)
-                        db.session.flush()  # Get the timeline ID
-                        tag.timeline_id = tag_timeline.id
-                    else:
-                        # Use existing timeline
-                        tag.timeline_id = tag_timeline.id
-
-                    # Add this event as a reference in the timeline
-                    new_event.referenced_in.append(tag_timeline)
-                else:
-                    # If tag exists, ensure this event is added to the corresponding timeline
-                    if tag.timeline_id:
-                        existing_timeline = Timeline.query.get(tag.timeline_id)
-                        if existing_timeline and existing_timeline not in new_event.referenced_in:
-                            new_event.referenced_in.append(existing_timeline)
-                    
-                new_event.tags.append(tag)
+            try:
+                tag_names = clean_tag_names(data['tags'])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+                
+            tags = resolve_tags(tag_names, created_by=1)  # Temporary default user ID
+            tag_timeline_ids = {tags[tag_name].timeline_id for tag_name in tag_names} - {None}
+            if tag_timeline_ids:
+                new_event.referenced_in.extend(Timeline.query.filter(Timeline.id.in_(tag_timeline_ids)))
+                new_event.reference_count = len(new_event.referenced_in)
+            new_event.tags.extend(tags[tag_name] for tag_name in tag_names)
         
         app.logger.info('Attempting to save event to database')
         try:
             db.session.add(new_event)
+            db.session.flush()
+            
+            # Count the event towards its timelines' rollups, trending scores and tag counts in the same transaction
+            record_event_rollups([new_event])
+            record_event_trending([new_event])
+            increment_counters(Tag.event_count, {tag.id: 1 for tag in new_event.tags})
+            event_timeline_ids = {timeline_id} | {timeline.id for timeline in new_event.referenced_in}
+            bump_timeline_versions(event_timeline_ids)
             db.session.commit()
             app.logger.info('Event saved successfully')
+            if new_event.preview_status == 'pending':
+                schedule_link_previews(Event, [(new_event.id, new_event.url)])
             
-            # Prepare tags for response
-            tag_list = [{'id': tag.id, 'name': tag.name} for tag in new_event.tags]
+            # Count the new usage towards autocomplete ranking
+            for tag in new_event.tags:
+                autocomplete_index.add_weight('tag', tag.id)
+            for weighted_timeline_id in event_timeline_ids:
+                autocomplete_index.add_weight('timeline', weighted_timeline_id)
             
-            return jsonify({
-                'id': new_event.id,
-                'title': new_event.title,
-                'description': new_event.description,
-                'event_date': new_event.event_date.isoformat(),
-                'type': new_event.type,
-                'url': new_event.url,
-                'url_title': new_event.url_title,
-                'url_description': new_event.url_description,
-                'url_image': new_event.url_image,
-                'media_url': new_event.media_url,
-                'media_type': new_event.media_type,
-                'created_by': new_event.created_by,
-                'created_at': new_event.created_at.isoformat(),
-                'tags': tag_list
-            }), 201
+            return json_response(serialize_event(new_event), 201)
             
         except Exception as db_error:
             db.session.rollback()
@@ -1506,6 +3195,198 @@ def create_timeline_v3_event(timeline_id):
         app.logger.error(f'Error creating event: {str(e)}')
         return jsonify({'error': f'Failed to save event: {str(e)}'}), 500
 
+# Events inserted per transaction by the bulk import endpoint
+BULK_IMPORT_CHUNK_SIZE = 1000
+
+def parse_import_row(data):
+    """
+    Validate one bulk import row and turn it into Event column values.
+
+    Returns:
+        Tuple of (event column dict, cleaned tag names)
+
+    Raises:
+        ValueError: If the row is invalid
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Row must be a JSON object')
+    missing = [key for key in ('title', 'event_date', 'type') if not data.get(key)]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+        
+    try:
+        # Keep the date exactly as provided, like create_timeline_v3_event does
+        event_date = datetime.fromisoformat(data['event_date'].replace('Z', '+00:00')).replace(tzinfo=None)
+        if data.get('created_at'):
+            created_at = datetime.fromisoformat(data['created_at'].replace('Z', '+00:00')).replace(tzinfo=None)
+        else:
+            created_at = datetime.now()
+    except (AttributeError, ValueError):
+        raise ValueError('Invalid date format. Please use ISO format (YYYY-MM-DDTHH:MM:SS)')
+        
+    values = {
+        'title': data['title'],
+        'description': data.get('description', ''),
+        'event_date': event_date,
+        'type': data['type'],
+        'url': None,
+        'url_title': None,
+        'url_description': None,
+        'url_image': None,
+        'preview_status': None,
+        'media_url': None,
+        'media_type': None,
+        'created_at': created_at,
+        'updated_at': created_at
+    }
+    if data.get('url'):
+        values.update(
+            url=data['url'],
+            url_title=data.get('url_title', ''),
+            url_description=data.get('url_description', ''),
+            url_image=data.get('url_image', ''),
+            preview_status='ok' if data.get('url_title') else 'pending'
+        )
+    if data.get('media_url'):
+        values.update(media_url=data['media_url'], media_type=data.get('media_type', ''))
+        
+    return values, clean_tag_names(data.get('tags'))
+
+def import_event_chunk(timeline_id, rows, created_by):
+    """
+    Insert one chunk of validated import rows in a single transaction.
+
+    Events, event_tags and event_timeline_refs are each written with one
+    multi-row INSERT, and the rollups, tag counts and timeline versions are
+    updated before the commit. URLs imported without a preview are left
+    pending for enrich_link_previews.py, which fetches them in batches.
+
+    Args:
+        timeline_id: Timeline the events are created in
+        rows: List of (event column dict, tag names) from parse_import_row
+        created_by: User ID recorded on the events
+
+    Returns:
+        The number of events inserted
+    """
+    tags = resolve_tags({tag_name for _, tag_names in rows for tag_name in tag_names}, created_by)
+    
+    # Each event references the timelines of its tags
+    row_ref_timeline_ids = [
+        {tags[tag_name].timeline_id for tag_name in tag_names} - {None}
+        for _, tag_names in rows
+    ]
+    event_ids = db.session.execute(
+        db.insert(Event).returning(Event.id, sort_by_parameter_order=True),
+        [
+            dict(values, timeline_id=timeline_id, created_by=created_by, reference_count=len(ref_timeline_ids))
+            for (values, _), ref_timeline_ids in zip(rows, row_ref_timeline_ids)
+        ]
+    ).scalars().all()
+    
+    tag_links = []
+    timeline_refs = []
+    rollup_rows = []
+    tag_uses = {}
+    touched_timelines = {timeline_id}
+    for event_id, (values, tag_names), ref_timeline_ids in zip(event_ids, rows, row_ref_timeline_ids):
+        for tag_name in tag_names:
+            tag_id = tags[tag_name].id
+            tag_links.append({'event_id': event_id, 'tag_id': tag_id})
+            tag_uses[tag_id] = tag_uses.get(tag_id, 0) + 1
+        timeline_refs.extend({'event_id': event_id, 'timeline_id': ref_id} for ref_id in ref_timeline_ids)
+        rollup_rows.extend(
+            (member_id, values['event_date'], values['type'])
+            for member_id in ref_timeline_ids | {timeline_id}
+        )
+        touched_timelines |= ref_timeline_ids
+        
+    if tag_links:
+        db.session.execute(event_tags.insert(), tag_links)
+    if timeline_refs:
+        db.session.execute(event_timeline_refs.insert(), timeline_refs)
+    increment_counters(Tag.event_count, tag_uses)
+    apply_rollup_counts(rollup_rows)
+    bump_timeline_versions(touched_timelines)
+    db.session.commit()
+    return len(event_ids)
+
+def iter_import_rows():
+    """Yield the rows of a bulk import body: a JSON array, or NDJSON read line by line"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        # The raw stream reads a byte at a time when split into lines; buffer it
+        for line in io.BufferedReader(request.stream, 64 * 1024):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield ValueError('Invalid JSON')
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            raise ValueError('Body must be a JSON array of events or NDJSON')
+        yield from data
+
+@app.route('/api/timeline-v3/<timeline_id>/events/bulk', methods=['POST'])
+@jwt_required()
+def bulk_import_timeline_v3_events(timeline_id):
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        # Get timeline
+        timeline = Timeline.query.get(timeline_id)
+        if not timeline:
+            return jsonify({'error': 'Timeline not found'}), 404
+        timeline_id = timeline.id
+        
+        imported = 0
+        errors = []
+        chunk = []
+        chunk_rows = []
+        
+        def flush_chunk():
+            nonlocal imported
+            try:
+                imported += import_event_chunk(timeline_id, chunk, current_user_id)
+            except Exception as chunk_error:
+                db.session.rollback()
+                app.logger.error(f'Bulk import chunk failed: {str(chunk_error)}')
+                errors.extend({'row': row, 'error': f'Database error: {str(chunk_error)}'} for row in chunk_rows)
+            chunk.clear()
+            chunk_rows.clear()
+            
+        # Validate and insert in one pass, a chunk at a time
+        try:
+            for row_number, data in enumerate(iter_import_rows()):
+                try:
+                    if isinstance(data, ValueError):
+                        raise data
+                    chunk.append(parse_import_row(data))
+                    chunk_rows.append(row_number)
+                except ValueError as e:
+                    errors.append({'row': row_number, 'error': str(e)})
+                    continue
+                if len(chunk) >= BULK_IMPORT_CHUNK_SIZE:
+                    flush_chunk()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if chunk:
+            flush_chunk()
+            
+        app.logger.info(f'Bulk imported {imported} events into timeline {timeline_id} ({len(errors)} errors)')
+        return jsonify({
+            'imported': imported,
+            'failed': len(errors),
+            'errors': errors
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f'Error importing events: {str(e)}')
+        return jsonify({'error': f'Failed to import events: {str(e)}'}), 500
+
 @app.route('/api/timeline-v3/<timeline_id>', methods=['DELETE'])
 def delete_timeline_v3(timeline_id):
     try:
@@ -1519,17 +3400,37 @@ def delete_timeline_v3(timeline_id):
         # Get all events that are directly in this timeline
         direct_events = Event.query.filter_by(timeline_id=timeline_id).all()
         
+        # Timelines referencing these events will show a different origin for them
+        bump_timeline_versions({
+            referencing_timeline.id
+            for event in direct_events
+            for referencing_timeline in event.referenced_in
+            if referencing_timeline.id != timeline.id
+        })
+        
         # For each direct event, remove it from the timeline
+        reference_deltas = {}
+        tag_deltas = {}
         for event in direct_events:
             # If the event is referenced in other timelines, just remove it from this one
             if event.referenced_in:
                 # Keep the event, but change its primary timeline to one of its references
                 event.timeline_id = event.referenced_in[0].id
-                # Remove this timeline from its references
-                event.referenced_in.remove(timeline)
+                # Remove this timeline from its references, if it is one
+                if timeline in event.referenced_in:
+                    event.referenced_in.remove(timeline)
+                    reference_deltas[event.id] = reference_deltas.get(event.id, 0) - 1
             else:
-                # If the event is not referenced elsewhere, delete it
+                # If the event is not referenced elsewhere, delete it (and its tag links)
+                for tag in event.tags:
+                    tag_deltas[tag.id] = tag_deltas.get(tag.id, 0) - 1
                 db.session.delete(event)
+        increment_counters(Event.reference_count, reference_deltas)
+        increment_counters(Tag.event_count, tag_deltas)
+        
+        # Other timelines' events stop referencing this one
+        db.session.flush()
+        release_timeline_references(timeline.id)
         
         # Find tags associated with this timeline
         associated_tags = Tag.query.filter_by(timeline_id=timeline_id).all()
@@ -1538,6 +3439,9 @@ def delete_timeline_v3(timeline_id):
         for tag in associated_tags:
             tag.timeline_id = None
         
+        # Drop the timeline's rollups (events moved elsewhere were already counted there)
+        clear_timeline_rollups([timeline.id])
+        
         # Delete the timeline
         db.session.delete(timeline)
         db.session.commit()
@@ -1551,11 +3455,8 @@ def delete_timeline_v3(timeline_id):
 @app.route('/api/timeline-v3/name/<string:timeline_name>', methods=['GET'])
 def get_timeline_v3_by_name(timeline_name):
     try:
-        # Convert the timeline name to uppercase to match our standardized format
-        timeline_name_upper = timeline_name.upper()
-        
         # Find the timeline by name (case-insensitive)
-        timeline = Timeline.query.filter(Timeline.name == timeline_name_upper).first_or_404()
+        timeline = Timeline.query.filter(Timeline.name_key == normalize_name(timeline_name)).first_or_404()
         
         return jsonify({
             'id': timeline.id,
@@ -1568,6 +3469,153 @@ def get_timeline_v3_by_name(timeline_name):
         app.logger.error(f'Error fetching timeline by name: {str(e)}')
         return jsonify({'error': 'Failed to fetch timeline'}), 500
 
+# Autocomplete result limits
+DEFAULT_AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+@app.route('/api/autocomplete', methods=['GET'])
+def autocomplete():
+    try:
+        prefix = request.args.get('prefix', '')
+        limit = request.args.get('limit', DEFAULT_AUTOCOMPLETE_LIMIT, type=int)
+        limit = max(1, min(limit, MAX_AUTOCOMPLETE_LIMIT))
+        
+        # Restrict to tags or timelines if asked (both by default)
+        kinds = get_list_arg(request.args, 'type') or None
+        if kinds and not set(kinds) <= {'tag', 'timeline'}:
+            return jsonify({'error': "type must be 'tag' or 'timeline'"}), 400
+            
+        sync_autocomplete_index()
+        return json_response({'results': autocomplete_index.search(prefix, limit, kinds)})
+        
+    except Exception as e:
+        app.logger.error(f'Error in autocomplete: {str(e)}')
+        return jsonify({'error': 'Autocomplete failed'}), 500
+
+# Trending result limits
+DEFAULT_TRENDING_LIMIT = 10
+MAX_TRENDING_LIMIT = 50
+
+@app.route('/api/trending', methods=['GET'])
+def get_trending():
+    try:
+        kind = request.args.get('type', 'timeline')
+        if kind not in ('tag', 'timeline'):
+            return jsonify({'error': "type must be 'tag' or 'timeline'"}), 400
+        limit = request.args.get('limit', DEFAULT_TRENDING_LIMIT, type=int)
+        limit = max(1, min(limit, MAX_TRENDING_LIMIT))
+        
+        # Top scores straight off the (kind, score) index, with names in the same query
+        model = Tag if kind == 'tag' else Timeline
+        rows = db.session.query(TrendingScore.entity_id, TrendingScore.score, model.name)\
+            .join(model, model.id == TrendingScore.entity_id)\
+            .filter(TrendingScore.kind == kind)\
+            .order_by(TrendingScore.score.desc())\
+            .limit(limit).all()
+            
+        # Report each score as decayed to now
+        epoch = db.session.query(TrendingEpoch.epoch).filter(TrendingEpoch.id == 1).scalar()
+        decay = trending_decay(epoch) if epoch is not None else 1
+        return json_response({
+            'type': kind,
+            'half_life_hours': TRENDING_HALF_LIFE_SECONDS / 3600,
+            'results': [
+                {'id': entity_id, 'name': name, 'score': round(score * decay, 4)}
+                for entity_id, score, name in rows
+            ]
+        })
+        
+    except Exception as e:
+        app.logger.error(f'Error fetching trending: {str(e)}')
+        return jsonify({'error': 'Failed to fetch trending'}), 500
+
+# Search page sizes
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Conditions limiting a search to one timeline, per kind ({id} is the result's ID);
+# correlated EXISTS checks cost one index lookup per match
+SEARCH_TIMELINE_SCOPES = {
+    'event': '''
+        EXISTS (SELECT 1 FROM event WHERE event.id = {id} AND event.timeline_id = :timeline_id)
+        OR EXISTS (
+            SELECT 1 FROM event_timeline_refs
+            WHERE event_timeline_refs.event_id = {id} AND event_timeline_refs.timeline_id = :timeline_id
+        )
+    ''',
+    'post': 'EXISTS (SELECT 1 FROM post WHERE post.id = {id} AND post.timeline_id = :timeline_id)',
+}
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    try:
+        # Get the words to search for
+        terms = search_terms(request.args.get('q'))
+        if not terms:
+            return jsonify({'error': 'A search query (q) is required'}), 400
+            
+        kind = request.args.get('type', 'event')
+        if kind not in SEARCH_KINDS:
+            return jsonify({'error': f"type must be one of: {', '.join(SEARCH_KINDS)}"}), 400
+            
+        limit = request.args.get('limit', DEFAULT_SEARCH_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, MAX_SEARCH_PAGE_SIZE))
+        try:
+            cursor = decode_search_cursor(request.args['cursor']) if request.args.get('cursor') else None
+            include = parse_include(request.args.get('include'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+            
+        # Optionally limit results to one timeline
+        timeline_id = request.args.get('timeline_id', type=int)
+        scope_sql = SEARCH_TIMELINE_SCOPES[kind] if timeline_id else None
+        
+        # Rank matches in the search index, fetching one extra row to know whether another page exists
+        sql, params = search_sql(db.engine.dialect.name, kind, terms, scope_sql, cursor, limit + 1)
+        if timeline_id:
+            params['timeline_id'] = timeline_id
+        matches = db.session.execute(db.text(sql), params).fetchall()
+        has_next = len(matches) > limit
+        matches = matches[:limit]
+        ids = [match.id for match in matches]
+        
+        # Load just this page's rows, keeping the ranked order
+        results = []
+        if kind == 'event':
+            events = {
+                event.id: event
+                for event in Event.query.options(selectinload(Event.tags)).filter(Event.id.in_(ids))
+            }
+            page_events = [events[row_id] for row_id in ids if row_id in events]
+            authors = author_payloads(page_events) if 'author' in include else [None] * len(page_events)
+            results = [serialize_event(event, author=author) for event, author in zip(page_events, authors)]
+        elif ids:
+            posts = {post.id: post for post in Post.query.filter(Post.id.in_(ids))}
+            timelines = {
+                timeline.id: timeline
+                for timeline in Timeline.query.filter(Timeline.id.in_({post.timeline_id for post in posts.values()}))
+            }
+            authors = get_user_summaries({post.created_by for post in posts.values()})
+            results = [
+                serialize_post(
+                    posts[row_id],
+                    timeline=timelines.get(posts[row_id].timeline_id),
+                    author=authors.get(posts[row_id].created_by)
+                )
+                for row_id in ids if row_id in posts
+            ]
+            
+        return json_response({
+            'results': results,
+            'next_cursor': encode_search_cursor(matches[-1].score, matches[-1].id) if has_next else None,
+            'has_next': has_next
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f'Error searching: {str(e)}')
+        return jsonify({'error': 'Search failed'}), 500
+
 @app.route('/api/url-preview', methods=['POST'])
 def url_preview():
     try:
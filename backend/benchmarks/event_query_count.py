@@ -0,0 +1,104 @@
+"""
+Regression check for the number of queries behind a timeline-v3 event read.
+
+Builds timelines in a temporary SQLite database where events carry tags
+and are referenced into their tag timelines, then counts the SQL
+statements (via a before_cursor_execute listener) that
+GET /api/timeline-v3/<id>/events runs for a small and a large timeline,
+for both the origin timeline and a tag timeline made of referenced events.
+The count must match EXPECTED_QUERIES at every size; any per-event lazy
+load or lookup makes it grow with the event count.
+
+Usage:
+    python benchmarks/event_query_count.py [small_count] [large_count]
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'event_query_count.db')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event as sa_event
+from app import app, db, User, Timeline, Tag
+
+# Statements per first read, by (events read, include=): the version check,
+# the timeline, the events and their tags; referenced events add their origin
+# timelines and origin tags, and embedding authors adds the user lookup. A
+# read never writes, so no INSERT may appear
+EXPECTED_QUERIES = {
+    ('origin', ''): 4,
+    ('origin', '?include=author'): 5,
+    ('referenced', ''): 6,
+    ('referenced', '?include=author'): 7,
+}
+
+def populate(event_count, label):
+    """Create a timeline of tagged events; returns (timeline ID, tag timeline ID)"""
+    client = app.test_client()
+    with app.app_context():
+        timeline = Timeline(name=f'QUERIES {label}', created_by=1)
+        db.session.add(timeline)
+        db.session.commit()
+        timeline_id = timeline.id
+    base = datetime(2020, 1, 1)
+    for i in range(event_count):
+        response = client.post(f'/api/timeline-v3/{timeline_id}/events', json={
+            'title': f'{label} event {i}',
+            'event_date': (base + timedelta(hours=i)).isoformat(),
+            'type': 'remark',
+            'tags': [f'{label}-shared', f'{label}-tag{i % 5}']
+        })
+        assert response.status_code == 201, response.get_json()
+    with app.app_context():
+        tag_timeline_id = db.session.query(Tag.timeline_id).filter(Tag.name == f'{label}-shared').scalar()
+    return timeline_id, tag_timeline_id
+
+def count_queries(path):
+    """Run a GET and return (status code, statements executed)"""
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    with app.app_context():
+        engine = db.engine
+    sa_event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = app.test_client().get(path)
+    finally:
+        sa_event.remove(engine, 'before_cursor_execute', record)
+    return response.status_code, len(statements)
+
+def main():
+    small_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    large_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='queries', email='queries@example.com', password_hash='x'))
+        db.session.commit()
+
+    counts = {}
+    for label, event_count in (('small', small_count), ('large', large_count)):
+        timeline_id, tag_timeline_id = populate(event_count, label)
+        for kind, read_id in (('origin', timeline_id), ('referenced', tag_timeline_id)):
+            for query in ('', '?include=author'):
+                status, queries = count_queries(f'/api/timeline-v3/{read_id}/events{query}')
+                assert status == 200, status
+                counts[(label, kind, query)] = queries
+                print(f'{event_count:>5} {kind} events{query}: {queries} queries')
+
+    problems = [
+        f'{label} {kind} events{query}: {queries} queries, expected {EXPECTED_QUERIES[(kind, query)]}'
+        for (label, kind, query), queries in counts.items()
+        if queries != EXPECTED_QUERIES[(kind, query)]
+    ]
+    if problems:
+        for problem in problems:
+            print('FAIL:', problem)
+        sys.exit(1)
+    print('OK: query count is fixed regardless of event count')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Correctness check for autocomplete prefix matching.
+
+Fills a PrefixIndex with names that continue past the typed prefix with
+characters outside the Basic Multilingual Plane (emoji and the last code
+point) and checks that search finds every one of them, through both the
+cached short-prefix lists and the full range scan.
+
+Usage:
+    python benchmarks/prefix_index_check.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prefix_index import PrefixIndex
+
+NAMES = {
+    1: 'party',
+    2: 'party\U0001f389',
+    3: 'party\U0001f389\U0001f973',
+    4: 'party\U0010ffff',
+    5: 'partz',
+    6: 'p\U0001f389',
+    7: '\U0010ffff\U0010ffff',
+}
+
+# Prefix -> IDs whose names start with it
+EXPECTED = {
+    'p': {1, 2, 3, 4, 5, 6},
+    'pa': {1, 2, 3, 4, 5},
+    'party': {1, 2, 3, 4},
+    'party\U0001f389': {2, 3},
+    'party\U0010ffff': {4},
+    'p\U0001f389': {6},
+    '\U0010ffff': {7},
+}
+
+def main():
+    index = PrefixIndex()
+    for entry_id, name in NAMES.items():
+        index.add('tag', entry_id, name)
+
+    problems = []
+    for prefix, expected in EXPECTED.items():
+        found = {result['id'] for result in index.search(prefix, limit=len(NAMES))}
+        print(f'{prefix!r}: {sorted(found)}')
+        if found != expected:
+            problems.append(f'{prefix!r} found {sorted(found)}, expected {sorted(expected)}')
+    if problems:
+        for problem in problems:
+            print('FAIL:', problem)
+        sys.exit(1)
+    print('OK: prefixes match names continuing with any code point')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark batch promotion rescoring against per-post updates.
+
+Fills a temporary SQLite database with synthetic posts (1,000,000 by
+default) of varied age, votes and sources, then times:
+
+- the per-row path: loading a sample of posts and calling
+  Post.update_promotion_score on each (extrapolated to the full table)
+- rescore_posts over every post, when every score changes
+- rescore_posts again right away, when nothing changes and only reads
+  and scoring are paid for
+
+and checks that both paths produce exactly the same scores and flags.
+
+Usage:
+    python benchmarks/promotion_benchmark.py [post_count] [sample_size]
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'promotion_benchmark.db')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, Post, rescore_posts
+
+def populate(post_count, now, timeline_count=20, batch_size=50000):
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.text(
+            "INSERT INTO user (id, username, email, password_hash) VALUES (1, 'bench', 'bench@example.com', 'x')"
+        ))
+        db.session.execute(db.text('INSERT INTO timeline (id, name, name_key, created_by, version) VALUES (:id, :name, :key, 1, 0)'), [
+            {'id': timeline_id, 'name': f'TIMELINE {timeline_id}', 'key': f'timeline {timeline_id}'}
+            for timeline_id in range(1, timeline_count + 1)
+        ])
+        insert_post = db.text('''
+            INSERT INTO post (id, title, content, event_date, timeline_id, created_by, created_at,
+                              upvotes, promotion_votes, source_count, promotion_score, promoted_to_event)
+            VALUES (:id, 'post', 'content', :created_at, :timeline_id, 1, :created_at,
+                    0, :votes, :sources, -1, 0)
+        ''')
+        for start in range(1, post_count + 1, batch_size):
+            posts = []
+            for post_id in range(start, min(start + batch_size, post_count + 1)):
+                created_at = now - timedelta(seconds=rng.randint(0, 30 * 86400))
+                posts.append({
+                    'id': post_id,
+                    'created_at': created_at,
+                    'timeline_id': rng.randint(1, timeline_count),
+                    'votes': int(rng.expovariate(0.2)),
+                    'sources': rng.randint(0, 5)
+                })
+            db.session.execute(insert_post, posts)
+            db.session.commit()
+
+def main():
+    post_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    sample_size = min(int(sys.argv[2]) if len(sys.argv) > 2 else 20000, post_count)
+    now = datetime.now()
+
+    started = time.perf_counter()
+    populate(post_count, now)
+    print(f'Inserted {post_count:,} posts in {time.perf_counter() - started:.1f}s', flush=True)
+
+    with app.app_context():
+        sample_ids = random.Random(7).sample(range(1, post_count + 1), sample_size)
+
+        # The batch runs score against the same clock, so results are comparable
+        scored_at = datetime.now()
+        started = time.perf_counter()
+        for post in Post.query.filter(Post.id.in_(sample_ids)).all():
+            post.update_promotion_score()
+        db.session.commit()
+        elapsed = time.perf_counter() - started
+        print(f'Per-row updates: {sample_size:,} posts in {elapsed:.2f}s '
+              f'(~{elapsed * post_count / sample_size:.0f}s for all {post_count:,})', flush=True)
+        expected = dict(db.session.query(Post.id, Post.promotion_score).filter(Post.id.in_(sample_ids)))
+
+        # Make every score stale again so the batch run has to write all rows
+        db.session.execute(db.text('UPDATE post SET promotion_score = -1, promoted_to_event = 0'))
+        db.session.commit()
+
+        for label in ('all rows changed', 'no rows changed'):
+            started = time.perf_counter()
+            scored, updated = rescore_posts(now=scored_at)
+            db.session.commit()
+            print(f'rescore_posts ({label}): {scored:,} scored, {updated:,} updated '
+                  f'in {time.perf_counter() - started:.2f}s', flush=True)
+
+        started = time.perf_counter()
+        scored, _ = rescore_posts(timeline_ids=[1], now=scored_at)
+        db.session.commit()
+        print(f'rescore_posts (one timeline): {scored:,} scored in {time.perf_counter() - started:.2f}s')
+
+        actual = dict(db.session.query(Post.id, Post.promotion_score).filter(Post.id.in_(sample_ids)))
+        mismatched = [post_id for post_id in sample_ids if actual[post_id] != expected[post_id]]
+        mismatched_flags = db.session.query(Post).filter(
+            (Post.promotion_score >= 5.0) != Post.promoted_to_event
+        ).count()
+        print(f'Score mismatches against per-row updates: {len(mismatched)}; flag mismatches: {mismatched_flags}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark /api/search against a large generated event table.
+
+Fills a temporary SQLite database with synthetic events (1,000,000 by
+default) spread over a few timelines, builds the search index with the
+add_search_index migration, then reports the median latency of several
+searches through the real endpoint: common, rare and prefix terms, a
+timeline-scoped search and a follow-up page. It also prints the query
+plan of the search SQL, which must only touch the FTS index and indexed
+ID lookups, never a scan of the event table.
+
+Usage:
+    python benchmarks/search_benchmark.py [event_count] [repeats]
+"""
+
+import os
+import sys
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'search_benchmark.db')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations'))
+
+from app import app, db, SEARCH_TIMELINE_SCOPES
+from search import search_terms, search_sql
+import add_search_index
+
+WORDS = (
+    'election summit treaty storm flood earthquake launch rocket orbit vaccine trial verdict '
+    'strike protest market crash rally merger acquisition festival premiere album tour record '
+    'championship final goal transfer coach injury budget tax reform bridge tunnel railway airport '
+    'museum discovery fossil telescope comet eclipse harvest drought wildfire volcano glacier'
+).split()
+
+def populate(event_count, timeline_count=20, batch_size=50000):
+    rng = random.Random(42)
+    base = datetime(1990, 1, 1)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.text(
+            "INSERT INTO user (id, username, email, password_hash) VALUES (1, 'bench', 'bench@example.com', 'x')"
+        ))
+        db.session.execute(db.text('INSERT INTO timeline (id, name, name_key, created_by, version) VALUES (:id, :name, :key, 1, 0)'), [
+            {'id': timeline_id, 'name': f'TIMELINE {timeline_id}', 'key': f'timeline {timeline_id}'}
+            for timeline_id in range(1, timeline_count + 1)
+        ])
+        db.session.execute(db.text('INSERT INTO tag (id, name, name_key) VALUES (:id, :name, :name)'), [
+            {'id': tag_id, 'name': word} for tag_id, word in enumerate(WORDS[:20], start=1)
+        ])
+        insert_event = db.text('''
+            INSERT INTO event (id, title, description, event_date, type, timeline_id, created_by, created_at, updated_at)
+            VALUES (:id, :title, :description, :event_date, 'remark', :timeline_id, 1, :event_date, :event_date)
+        ''')
+        insert_tag = db.text('INSERT INTO event_tags (event_id, tag_id) VALUES (:event_id, :tag_id)')
+        for start in range(1, event_count + 1, batch_size):
+            events = []
+            tags = []
+            for event_id in range(start, min(start + batch_size, event_count + 1)):
+                # Skew word choice so some terms are common and others rare
+                title = ' '.join(rng.choice(WORDS[:int(len(WORDS) * rng.random()) + 1]) for _ in range(4))
+                description = ' '.join(rng.choice(WORDS) for _ in range(12))
+                if event_id % 100000 == 0:
+                    title += ' zeppelin'
+                events.append({
+                    'id': event_id,
+                    'title': title,
+                    'description': description,
+                    'event_date': base + timedelta(minutes=17 * event_id),
+                    'timeline_id': rng.randint(1, timeline_count)
+                })
+                tags.append({'event_id': event_id, 'tag_id': rng.randint(1, 20)})
+            db.session.execute(insert_event, events)
+            db.session.execute(insert_tag, tags)
+            db.session.commit()
+
+def timed(client, url, repeats):
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.get_json()
+    return statistics.median(samples) * 1000, response.get_json()
+
+def main():
+    event_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    started = time.perf_counter()
+    populate(event_count)
+    print(f'Inserted {event_count:,} events in {time.perf_counter() - started:.1f}s', flush=True)
+
+    with app.app_context():
+        started = time.perf_counter()
+        add_search_index.upgrade()
+        print(f'Built search index in {time.perf_counter() - started:.1f}s', flush=True)
+
+        sql, _ = search_sql('sqlite', 'event', search_terms('zeppelin'), SEARCH_TIMELINE_SCOPES['event'], (0.0, 1), 21)
+        print('Query plan (timeline-scoped page 2):')
+        for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'), {
+            'match': '"zeppelin"*', 'timeline_id': 1, 'cursor_rank': 0.0, 'cursor_id': 1, 'limit': 21
+        }):
+            print('   ', row[-1])
+
+    client = app.test_client()
+    cases = [
+        ('common term', '/api/search?q=election'),
+        ('two terms', '/api/search?q=storm+flood'),
+        ('rare term', '/api/search?q=zeppelin'),
+        ('prefix', '/api/search?q=earthq'),
+        ('timeline-scoped', '/api/search?q=election&timeline_id=3'),
+    ]
+    for label, url in cases:
+        elapsed, payload = timed(client, url, repeats)
+        print(f'{label:>16}: {elapsed:8.1f} ms  ({len(payload["results"])} results, has_next={payload["has_next"]})')
+        if payload['next_cursor']:
+            elapsed, payload = timed(client, f'{url}&cursor={payload["next_cursor"]}', repeats)
+            print(f'{"  next page":>16}: {elapsed:8.1f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Regression check for events tagged with their own timeline's name.
+
+Creating an event tagged '#foo' on timeline FOO references the event into
+FOO itself. Builds such a timeline in a temporary SQLite database and
+checks that its stats row, its rollup histogram and its events endpoint
+all count each event once.
+
+Usage:
+    python benchmarks/self_reference_counts.py [event_count]
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'self_reference_counts.db')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, User, Timeline, TimelineStats
+
+def main():
+    event_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, username='selfref', email='selfref@example.com', password_hash='x'))
+        timeline = Timeline(name='FOO', created_by=1)
+        db.session.add(timeline)
+        db.session.commit()
+        timeline_id = timeline.id
+
+    client = app.test_client()
+    base = datetime(2020, 1, 1)
+    for i in range(event_count):
+        response = client.post(f'/api/timeline-v3/{timeline_id}/events', json={
+            'title': f'self reference {i}',
+            'event_date': (base + timedelta(days=i)).isoformat(),
+            'type': 'remark',
+            'tags': ['foo']
+        })
+        assert response.status_code == 201, response.get_json()
+
+    events = client.get(f'/api/timeline-v3/{timeline_id}/events').get_json()
+    histogram = client.get(f'/api/timeline-v3/{timeline_id}/histogram?bucket=month').get_json()
+    with app.app_context():
+        stats = TimelineStats.query.get(timeline_id)
+        stats_count = stats.event_count if stats else 0
+
+    counts = {
+        'events endpoint': len(events),
+        'stats event_count': stats_count,
+        'histogram total': histogram['total'],
+    }
+    for name, count in counts.items():
+        print(f'{name}: {count}')
+    problems = [f'{name} is {count}, expected {event_count}' for name, count in counts.items() if count != event_count]
+    if problems:
+        for problem in problems:
+            print('FAIL:', problem)
+        sys.exit(1)
+    print('OK: self-referenced events are counted once')
+
+if __name__ == '__main__':
+    main()
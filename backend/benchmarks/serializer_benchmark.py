@@ -0,0 +1,106 @@
+"""
+Compare the shared event serializer against the old hand-built payloads.
+
+Builds 10,000 in-memory events (no database needed) and reports encoded
+size and best-of-N serialization time for:
+    - the previous per-field isoformat() + jsonify() code path
+    - serializers.serialize_event + serializers.dumps with all fields
+    - the same with the marker projection fields=id,event_date,type
+
+Usage:
+    python benchmarks/serializer_benchmark.py [event_count] [repeats]
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from flask import Flask, jsonify
+
+import serializers
+from serializers import EVENT_FIELDS, parse_fields, serialize_event, serialize_tag, dumps
+
+def make_events(count):
+    base = datetime(2020, 1, 1)
+    tags = [SimpleNamespace(id=i, name=f'tag{i}') for i in range(50)]
+    return [
+        SimpleNamespace(
+            id=i,
+            title=f'Event {i}',
+            description='Something happened on the timeline. ' * 3,
+            event_date=base + timedelta(minutes=37 * i),
+            type=('remark', 'news', 'media')[i % 3],
+            url=f'https://example.com/articles/{i}' if i % 2 else None,
+            url_title=f'Article {i}' if i % 2 else None,
+            url_description='An article about the event' if i % 2 else None,
+            url_image=f'https://example.com/images/{i}.jpg' if i % 2 else None,
+            media_url=None,
+            media_type=None,
+            timeline_id=1,
+            created_by=1,
+            created_at=base + timedelta(minutes=37 * i, seconds=5),
+            tags=[tags[i % 50], tags[(i * 7) % 50]]
+        )
+        for i in range(count)
+    ]
+
+def legacy_payload(events):
+    """The dicts get_timeline_v3_events used to build by hand"""
+    return [{
+        'id': event.id,
+        'title': event.title,
+        'description': event.description,
+        'event_date': event.event_date.isoformat(),
+        'type': event.type,
+        'url': event.url,
+        'url_title': event.url_title,
+        'url_description': event.url_description,
+        'url_image': event.url_image,
+        'media_url': event.media_url,
+        'media_type': event.media_type,
+        'timeline_id': event.timeline_id,
+        'created_by': event.created_by,
+        'created_at': event.created_at.isoformat(),
+        'tags': [{'id': tag.id, 'name': tag.name} for tag in event.tags]
+    } for event in events]
+
+def best_of(repeats, func):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    events = make_events(count)
+    marker_fields = parse_fields('id,event_date,type')
+
+    app = Flask(__name__)
+    with app.app_context():
+        cases = [
+            ('legacy isoformat + jsonify', lambda: jsonify(legacy_payload(events)).get_data()),
+            ('serializer, all fields', lambda: dumps([
+                serialize_event(event, EVENT_FIELDS, [serialize_tag(tag) for tag in event.tags]) for event in events
+            ])),
+            ('serializer, fields=id,event_date,type', lambda: dumps([
+                serialize_event(event, marker_fields) for event in events
+            ])),
+        ]
+
+        encoder = 'orjson' if serializers.orjson is not None else 'json (orjson not installed)'
+        print(f"{count} events, best of {repeats}, encoder: {encoder}")
+        print(f"{'case':<40} {'bytes':>12} {'ms':>10}")
+        baseline = None
+        for name, func in cases:
+            seconds, body = best_of(repeats, func)
+            baseline = baseline or seconds
+            print(f"{name:<40} {len(body):>12,} {seconds * 1000:>10.1f}  ({baseline / seconds:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Stress test tag get-or-create under concurrent event creation.
+
+Starts several threads that all create timeline-v3 events at once, each
+tagged with a mix of shared brand-new tags, so workers race to create the
+same tags and tag timelines. Afterwards it checks that:
+    - every request succeeded and no event was lost
+    - each tag exists once, with exactly one tag timeline
+    - every event is linked to all of its tags and tag timelines
+
+Runs against DATABASE_URL when set (point it at a scratch Postgres
+database to exercise real row locking), otherwise against a temporary
+SQLite file. Never point it at a database you care about.
+
+Usage:
+    python benchmarks/tag_contention_stress.py [threads] [events_per_thread] [tag_count]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+if not os.getenv('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'tag_stress.db')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, User, Timeline, Tag, Event, event_tags, event_timeline_refs
+
+def setup():
+    with app.app_context():
+        db.create_all()
+        if not db.session.get(User, 1):
+            db.session.add(User(id=1, username='stress', email='stress@example.com', password_hash='x'))
+        timeline = Timeline(name=f'STRESS {time.time_ns()}', description='Tag contention stress test', created_by=1)
+        db.session.add(timeline)
+        db.session.commit()
+        return timeline.id
+
+def worker(thread_number, timeline_id, events_per_thread, tag_names, run_id, failures):
+    client = app.test_client()
+    base = datetime(2020, 1, 1)
+    for i in range(events_per_thread):
+        # Every thread walks the same tags at a different pace and direction
+        tags = [tag_names[(i * (thread_number + 1) + offset) % len(tag_names)] for offset in range(3)]
+        if thread_number % 2:
+            tags.reverse()
+        response = client.post(f'/api/timeline-v3/{timeline_id}/events', json={
+            'title': f'{run_id} thread {thread_number} event {i}',
+            'event_date': (base + timedelta(minutes=i)).isoformat(),
+            'type': 'remark',
+            'tags': tags
+        })
+        if response.status_code != 201:
+            failures.append((thread_number, i, response.status_code, response.get_json()))
+
+def check(timeline_id, expected_events, tag_names, run_id):
+    problems = []
+    with app.app_context():
+        events = Event.query.filter(Event.timeline_id == timeline_id, Event.title.like(f'{run_id} %')).all()
+        if len(events) != expected_events:
+            problems.append(f'expected {expected_events} events, found {len(events)}')
+
+        tags = Tag.query.filter(Tag.name.in_(tag_names)).all()
+        if len(tags) != len(tag_names):
+            problems.append(f'expected {len(tag_names)} tags, found {len(tags)}')
+        for tag in tags:
+            if tag.timeline_id is None:
+                problems.append(f'tag {tag.name} has no timeline')
+            timelines = Timeline.query.filter(db.func.lower(Timeline.name) == tag.name).count()
+            if timelines != 1:
+                problems.append(f'tag {tag.name} has {timelines} timelines')
+
+        event_ids = [event.id for event in events]
+        tag_links = db.session.query(event_tags).filter(event_tags.c.event_id.in_(event_ids)).count()
+        refs = db.session.query(event_timeline_refs).filter(event_timeline_refs.c.event_id.in_(event_ids)).count()
+        if tag_links != 3 * len(events):
+            problems.append(f'expected {3 * len(events)} event_tags rows, found {tag_links}')
+        if refs != 3 * len(events):
+            problems.append(f'expected {3 * len(events)} event_timeline_refs rows, found {refs}')
+    return problems
+
+def main():
+    thread_count = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    events_per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    tag_count = int(sys.argv[3]) if len(sys.argv) > 3 else 12
+
+    run_id = f'stress{time.time_ns()}'
+    tag_names = [f'{run_id}-{i}' for i in range(tag_count)]
+    timeline_id = setup()
+    print(f'{thread_count} threads x {events_per_thread} events, {tag_count} new tags, '
+          f'{app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0]}')
+
+    failures = []
+    threads = [
+        threading.Thread(target=worker, args=(n, timeline_id, events_per_thread, tag_names, run_id, failures))
+        for n in range(thread_count)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    problems = [f'request failed: {failure}' for failure in failures[:10]]
+    problems += check(timeline_id, thread_count * events_per_thread, tag_names, run_id)
+    print(f'{thread_count * events_per_thread} requests in {elapsed:.1f}s, {len(failures)} failed')
+    if problems:
+        for problem in problems:
+            print('FAIL:', problem)
+        sys.exit(1)
+    print('OK: no lost events, one tag and one tag timeline per name')
+
+if __name__ == '__main__':
+    main()
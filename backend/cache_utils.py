@@ -0,0 +1,167 @@
+from collections import OrderedDict
+import hashlib
+import math
+import threading
+import time
+
+class LRUCache:
+    """
+    A small thread-safe least-recently-used cache
+
+    Each gunicorn worker holds its own instance, so entries must be safe to
+    serve without coordination (e.g. keyed by a version that changes
+    whenever the underlying data does).
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Look up a key, marking it as recently used
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            The cached value, or default
+        """
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class SizedLRUCache(LRUCache):
+    """
+    An LRUCache that also bounds the total size of its values
+
+    Least recently used entries are evicted until both the entry count and
+    the summed ``sizeof`` of the values fit. A value larger than
+    ``max_item_bytes`` isn't cached at all, so one huge value can't flush
+    everything else.
+    """
+
+    def __init__(self, maxsize=256, max_bytes=32 * 1024 * 1024, max_item_bytes=None, sizeof=len):
+        super().__init__(maxsize)
+        self.max_bytes = max_bytes
+        self.max_item_bytes = min(max_item_bytes or max_bytes, max_bytes)
+        self.sizeof = sizeof
+        self._sizes = {}
+        self.total_bytes = 0
+
+    def _discard(self, key):
+        """Remove a key if present (call with the lock held)"""
+        if key in self._entries:
+            del self._entries[key]
+            self.total_bytes -= self._sizes.pop(key)
+
+    def set(self, key, value):
+        """Store a value, evicting least recently used entries until it fits"""
+        size = self.sizeof(value)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_item_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            while len(self._entries) > self.maxsize or self.total_bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+class TTLCache(LRUCache):
+    """
+    An LRUCache whose entries also expire ``ttl`` seconds after being set
+
+    For data that can change without a version to key on: other workers
+    can't invalidate this worker's entries, so the TTL bounds how stale a
+    value can get.
+    """
+
+    def __init__(self, maxsize=256, ttl=300):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return default
+        return value
+
+    def set(self, key, value):
+        super().set(key, (time.monotonic() + self.ttl, value))
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter of strings
+
+    Membership tests never give false negatives and give false positives at
+    about ``error_rate`` while no more than ``capacity`` items have been
+    added. Positions come from one 128-bit BLAKE2b digest split into two
+    halves and combined by double hashing. Items can't be removed; build a
+    new filter instead.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.bit_count = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.bit_count / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.bit_count + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * step) % self.bit_count for index in range(self.hash_count)]
+
+    def add(self, item):
+        """Add a string to the filter"""
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def is_full(self):
+        """Whether more items were added than the filter was sized for"""
+        return self.count > self.capacity
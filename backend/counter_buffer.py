@@ -0,0 +1,126 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+class CounterBuffer:
+    """
+    Coalesces counter increments in memory and writes them out in batches
+
+    Increments are summed per key, so a burst of votes on one post becomes
+    a single ``+ n`` update instead of one write per vote. A background
+    thread flushes every ``interval`` seconds, and a flush is triggered
+    early once ``max_pending`` increments are waiting, so a crash loses at
+    most about that many increments or that many seconds' worth. Pending
+    increments are also flushed when the interpreter exits normally.
+
+    A batch whose flush fails is put back for the next attempt, unless that
+    would leave more than ``max_retained`` increments waiting (e.g. while
+    the database is down); then the batch is dropped and logged, so memory
+    and the eventual loss stay bounded.
+
+    Each gunicorn worker holds its own buffer; the flush function must
+    apply increments atomically (``SET n = n + :amount``) so workers never
+    overwrite each other.
+    """
+
+    def __init__(self, flush_fn, interval=2.0, max_pending=1000, max_retained=None):
+        """
+        Args:
+            flush_fn: Called with a {key: amount} dict of increments to apply;
+                if it raises, the increments are kept for the next flush
+            interval: Maximum seconds an increment waits before being flushed
+            max_pending: Number of waiting increments that triggers an early flush
+            max_retained: Most increments kept waiting after a failed flush;
+                defaults to ten times max_pending
+        """
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_retained = max_retained or 10 * max_pending
+        self.dropped = 0  # Increments discarded after failed flushes
+        self._pending = Counter()
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _start(self):
+        """Start the flusher thread on first use (call with the lock held)"""
+        if self._thread is None:
+            atexit.register(self.flush)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='counter-buffer-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Already re-queued by flush; try again next round
+                pass
+
+    def add(self, key, amount=1):
+        """
+        Queue an increment without touching the database
+
+        Returns:
+            The amount now waiting to be flushed for this key
+        """
+        with self._lock:
+            self._pending[key] += amount
+            self._pending_total += abs(amount)
+            self._start()
+            if self._pending_total >= self.max_pending:
+                self._wakeup.set()
+            return self._pending[key]
+
+    def pending(self, key):
+        """The amount waiting to be flushed for a key"""
+        with self._lock:
+            return self._pending.get(key, 0)
+
+    def flush(self):
+        """
+        Hand every waiting increment to the flush function now
+
+        Returns:
+            Number of keys flushed
+
+        Raises:
+            Whatever the flush function raised; the increments are put back
+            unless that would exceed max_retained
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = {key: amount for key, amount in self._pending.items() if amount}
+                self._pending = Counter()
+                self._pending_total = 0
+            if not batch:
+                return 0
+            try:
+                self.flush_fn(batch)
+            except Exception:
+                batch_total = sum(abs(amount) for amount in batch.values())
+                with self._lock:
+                    if self._pending_total + batch_total <= self.max_retained:
+                        for key, amount in batch.items():
+                            self._pending[key] += amount
+                        self._pending_total += batch_total
+                        batch_total = 0
+                    else:
+                        self.dropped += batch_total
+                if batch_total:
+                    logger.error(f'Dropped {batch_total} buffered increments across {len(batch)} keys '
+                                 f'after a failed flush ({self.dropped} dropped in total)')
+                raise
+            return len(batch)
+
+    def __len__(self):
+        return len(self._pending)
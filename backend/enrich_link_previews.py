@@ -0,0 +1,51 @@
+"""
+Fetch the link previews of posts and events still marked pending.
+
+Usage:
+    python enrich_link_previews.py             # rows pending for over 10 minutes
+    python enrich_link_previews.py 0           # every pending row
+    python enrich_link_previews.py 60          # rows pending for over an hour
+
+Single creates are normally enriched by each worker's background pool
+right after they are saved. Bulk imports, rows the pool had no room for,
+and rows queued in a worker that was restarted stay pending until this
+runs; schedule it from cron (e.g. every few minutes).
+"""
+
+from app import app, db, Event, Post, LINK_PREVIEW_BATCH_SIZE, enrich_link_previews
+from datetime import datetime, timedelta
+import sys
+
+def enrich(min_age_minutes=10):
+    with app.app_context():
+        db.create_all()
+        
+        # created_at is local time on both tables
+        cutoff = datetime.now() - timedelta(minutes=min_age_minutes)
+        try:
+            pending = {
+                model: db.session.query(model.id, model.url)
+                    .filter(model.preview_status == 'pending', model.created_at <= cutoff)
+                    .order_by(model.id)
+                    .all()
+                for model in (Post, Event)
+            }
+        except Exception as e:
+            print(f"Error loading pending previews: {str(e)}")
+            return False
+        finally:
+            db.session.rollback()
+            
+        print(f"Enriching {sum(map(len, pending.values()))} pending link previews...")
+        enriched = 0
+        for model, rows in pending.items():
+            # One transaction (and one timeline version bump) per batch
+            for start in range(0, len(rows), LINK_PREVIEW_BATCH_SIZE):
+                enriched += enrich_link_previews(model, [tuple(row) for row in rows[start:start + LINK_PREVIEW_BATCH_SIZE]])
+        print(f"Enriched {enriched} rows.")
+        return True
+
+if __name__ == "__main__":
+    min_age_minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    success = enrich(min_age_minutes)
+    sys.exit(0 if success else 1)
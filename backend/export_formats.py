@@ -0,0 +1,109 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+# Export formats: (mimetype, file extension)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+    'ics': ('text/calendar', 'ics'),
+}
+
+def csv_chunk(rows):
+    """
+    Encode rows as CSV text
+
+    Args:
+        rows: Iterable of lists of cell values; datetimes are written in
+            ISO 8601 and None as an empty cell
+
+    Returns:
+        The CSV text for those rows
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else ('' if value is None else value)
+            for value in row
+        ])
+    return buffer.getvalue()
+
+def _ics_escape(value):
+    """Escape a TEXT value per RFC 5545 section 3.3.11"""
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+def _ics_line(line):
+    """Fold a content line to 75 octets per RFC 5545 section 3.1"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74  # continuation lines start with a space
+        cut = min(limit, len(encoded))
+        # Don't split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts) + '\r\n'
+
+def _ics_datetime(value):
+    """Format a naive UTC datetime as an iCalendar UTC date-time"""
+    # glibc's %Y doesn't zero-pad years before 1000, which iCalendar requires
+    return f'{value.year:04d}' + value.strftime('%m%dT%H%M%SZ')
+
+def ics_header(calendar_name):
+    """Opening lines of an iCalendar feed"""
+    return ''.join([
+        _ics_line('BEGIN:VCALENDAR'),
+        _ics_line('VERSION:2.0'),
+        _ics_line('PRODID:-//Timeline Forum//Timeline Export//EN'),
+        _ics_line('CALSCALE:GREGORIAN'),
+        _ics_line(f'X-WR-CALNAME:{_ics_escape(calendar_name)}'),
+    ])
+
+def ics_event(uid, start, summary, description=None, url=None, categories=None, stamp=None):
+    """
+    Encode one VEVENT
+
+    Args:
+        uid: Globally unique, stable identifier of the event
+        start: Naive UTC datetime of the event
+        summary: Event title
+        description: Optional longer text
+        url: Optional link
+        categories: Optional list of category (tag) names
+        stamp: Naive UTC datetime the event was created; defaults to now
+
+    Returns:
+        The VEVENT block as text
+    """
+    stamp = stamp or datetime.now(timezone.utc).replace(tzinfo=None)
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{_ics_datetime(stamp)}',
+        f'DTSTART:{_ics_datetime(start)}',
+        f'SUMMARY:{_ics_escape(summary)}',
+    ]
+    if description:
+        lines.append(f'DESCRIPTION:{_ics_escape(description)}')
+    if url:
+        lines.append(f'URL:{url}')
+    if categories:
+        lines.append('CATEGORIES:' + ','.join(_ics_escape(category) for category in categories))
+    lines.append('END:VEVENT')
+    return ''.join(_ics_line(line) for line in lines)
+
+def ics_footer():
+    """Closing line of an iCalendar feed"""
+    return _ics_line('END:VCALENDAR')
@@ -11,7 +11,7 @@ This script:
 Run this script once to fix existing data after updating the hashtag system.
 """
 
-from app import app, db, Timeline, Event, Tag
+from app import app, db, Timeline, Event, Tag, normalize_name
 from flask import Flask
 import sys
 
@@ -32,7 +32,7 @@ def fix_hashtag_timelines():
             
             # Check if a timeline with the clean name already exists
             existing_timeline = Timeline.query.filter(
-                db.func.lower(Timeline.name) == db.func.lower(clean_name)
+                Timeline.name_key == normalize_name(clean_name)
             ).first()
             
             if existing_timeline:
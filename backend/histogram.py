@@ -0,0 +1,185 @@
+import functools
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Bucket sizes supported by the timeline-v3 histogram
+BUCKET_SIZES = ('hour', 'day', 'month', 'year')
+
+# Upper bound on buckets per request, so a wide range can't blow up a response
+MAX_BUCKETS = 5000
+
+# Years whose UTC offsets are checked one by one. Zone data is constant
+# (local mean time) before the first and repeats a yearly rule after the
+# last, so those stand in for every earlier and later year
+OFFSET_SCAN_YEARS = (1800, 2100)
+
+def get_timezone(name):
+    """
+    Look up an IANA time zone by name
+
+    Args:
+        name: Zone name such as 'America/Los_Angeles'; empty means UTC
+
+    Returns:
+        A tzinfo object
+
+    Raises:
+        ValueError: If the zone is unknown
+    """
+    if not name or name.upper() == 'UTC':
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f'Unknown time zone: {name}')
+
+@functools.lru_cache(maxsize=4096)
+def _year_has_fractional_offset(tz, year):
+    """Whether a zone is ever off a whole-hour UTC offset during a year, sampled daily"""
+    moment = datetime(year, 1, 1, tzinfo=timezone.utc)
+    end = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    while moment < end:
+        if moment.astimezone(tz).utcoffset() % timedelta(hours=1):
+            return True
+        moment += timedelta(days=1)
+    return False
+
+def has_fractional_offset(tz, start, end):
+    """
+    Whether a zone's UTC offset is anything but a whole number of hours
+    at some point of a window
+
+    Catches historical local mean time (e.g. America/New_York before 1883)
+    and half-hour zones or DST shifts (e.g. Asia/Kolkata, Australia/Lord_Howe),
+    wherever in the window they apply. Results are cached per zone and year.
+
+    Args:
+        tz: A tzinfo from get_timezone
+        start: Naive UTC start of the window
+        end: Naive UTC end of the window
+
+    Returns:
+        True if some local hour in the window doesn't start on a UTC hour
+    """
+    if isinstance(tz, timezone):
+        return bool(tz.utcoffset(None) % timedelta(hours=1))
+    first_year, last_year = (
+        min(max(moment.year, OFFSET_SCAN_YEARS[0]), OFFSET_SCAN_YEARS[1])
+        for moment in (start, end)
+    )
+    return any(_year_has_fractional_offset(tz, year) for year in range(first_year, last_year + 1))
+
+def _floor_local(moment, bucket):
+    """Truncate a local datetime to the start of its bucket"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if bucket == 'hour':
+        return moment
+    moment = moment.replace(hour=0)
+    if bucket == 'day':
+        return moment
+    moment = moment.replace(day=1)
+    if bucket == 'month':
+        return moment
+    return moment.replace(month=1)
+
+def _next_local(moment, bucket):
+    """Step a local bucket start forward by one bucket"""
+    if bucket == 'day':
+        return moment + timedelta(days=1)
+    if bucket == 'month':
+        if moment.month == 12:
+            return moment.replace(year=moment.year + 1, month=1)
+        return moment.replace(month=moment.month + 1)
+    return moment.replace(year=moment.year + 1)
+
+def bucket_boundaries(start, end, bucket, tz):
+    """
+    Build the bucket start times covering [start, end)
+
+    Day, month and year buckets follow the local calendar of ``tz`` (so DST
+    days are 23 or 25 hours long, like the frontend's local-time markers).
+    Hour buckets step in real time from the first local hour boundary.
+
+    Args:
+        start: Naive UTC datetime of the first instant to cover
+        end: Naive UTC datetime just past the last instant to cover
+        bucket: One of BUCKET_SIZES
+        tz: tzinfo to bucket in
+
+    Returns:
+        Tuple of (local bucket starts, numpy datetime64[us] UTC edges); the
+        edges hold one more entry than the starts, closing the last bucket
+
+    Raises:
+        ValueError: If the range needs more than MAX_BUCKETS buckets
+    """
+    local_start = start.replace(tzinfo=timezone.utc).astimezone(tz)
+    utc_end = end.replace(tzinfo=timezone.utc)
+
+    local_starts = []
+    edges = []
+    moment = _floor_local(local_start.replace(tzinfo=None), bucket)
+    if bucket == 'hour':
+        current = moment.replace(tzinfo=tz).astimezone(timezone.utc)
+    while True:
+        if bucket == 'hour':
+            utc_moment = current
+            local_moment = current.astimezone(tz)
+        else:
+            local_moment = moment.replace(tzinfo=tz)
+            utc_moment = local_moment.astimezone(timezone.utc)
+        edges.append(utc_moment.replace(tzinfo=None))
+        if utc_moment >= utc_end:
+            break
+        local_starts.append(local_moment)
+        if len(local_starts) > MAX_BUCKETS:
+            raise ValueError(f'Range spans more than {MAX_BUCKETS} {bucket} buckets')
+        if bucket == 'hour':
+            current = current + timedelta(hours=1)
+        else:
+            moment = _next_local(moment, bucket)
+
+    return local_starts, np.array(edges, dtype='datetime64[us]')
+
+def bucket_counts(timestamps, edges, categories=None, weights=None):
+    """
+    Count timestamps per bucket in one vectorized pass
+
+    Args:
+        timestamps: Sequence of naive UTC datetimes (or datetime64 values)
+        edges: Bucket edges from bucket_boundaries
+        categories: Optional sequence parallel to timestamps (e.g. event
+            types) to break each bucket's count down by
+        weights: Optional per-timestamp counts, for pre-aggregated input
+
+    Returns:
+        Tuple of (totals array, {category: counts array}); the dict is
+        empty when no categories are given
+    """
+    bucket_count = len(edges) - 1
+    times = np.asarray(timestamps, dtype='datetime64[us]')
+    weights = None if weights is None else np.asarray(weights, dtype=np.int64)
+
+    # Locate each timestamp's bucket and drop anything outside the range
+    indexes = np.searchsorted(edges, times, side='right') - 1
+    in_range = (indexes >= 0) & (indexes < bucket_count)
+    indexes = indexes[in_range]
+    if weights is not None:
+        weights = weights[in_range]
+
+    totals = np.bincount(indexes, weights=weights, minlength=bucket_count).astype(np.int64)
+
+    breakdown = {}
+    if categories is not None:
+        labels, codes = np.unique(np.asarray(categories, dtype=object)[in_range].astype(str), return_inverse=True)
+        # Encode (bucket, category) pairs so one bincount fills the whole table
+        table = np.bincount(
+            indexes * len(labels) + codes,
+            weights=weights,
+            minlength=bucket_count * len(labels)
+        ).astype(np.int64).reshape(bucket_count, len(labels))
+        for position, label in enumerate(labels):
+            breakdown[label] = table[:, position]
+
+    return totals, breakdown
@@ -10,7 +10,7 @@ Removed due to changing requirements and simplified event creation approach.
 class PostPromotionSystem:
     def calculate_promotion_score(self, post):
         base_score = post.upvotes
-        comment_bonus = len(post.comments) * 0.5
+        comment_bonus = post.comment_count * 0.5
         source_bonus = post.source_count * 2
         content_bonus = min(len(post.content) / 500, 2)
         promotion_bonus = post.promotion_votes * 1.5
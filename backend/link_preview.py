@@ -0,0 +1,212 @@
+import requests
+from bs4 import BeautifulSoup
+from urllib.parse import urlparse, urlunparse, parse_qs, parse_qsl, urlencode
+
+# Browser-like agent; some sites serve bots a page without preview metadata
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Seconds to wait for a remote host
+FETCH_TIMEOUT = 10
+
+# Query parameters that only track where a link was shared and never change the page
+TRACKING_PARAMS = ('fbclid', 'gclid', 'igshid', 'mc_cid', 'mc_eid')
+
+# Parameters YouTube adds to shared links; elsewhere they may select content
+YOUTUBE_HOSTS = ('youtu.be', 'youtube.com', 'www.youtube.com', 'm.youtube.com')
+YOUTUBE_TRACKING_PARAMS = ('si', 'feature')
+
+def normalize_url(url):
+    """
+    Canonical form of a URL, used as its preview cache key
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, sorts the remaining query, and maps the YouTube
+    link variants of one video to a single watch URL. The result is only a
+    key: pages are still fetched from the URL as given.
+
+    Args:
+        url: URL as entered by a user
+
+    Returns:
+        The normalized URL
+
+    Raises:
+        ValueError: If the URL isn't an absolute http(s) URL
+    """
+    parsed = urlparse((url or '').strip())
+    scheme = parsed.scheme.lower()
+    if scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError('URL must be an absolute http(s) URL')
+    host = parsed.hostname.lower()
+    if parsed.port and parsed.port != {'http': 80, 'https': 443}[scheme]:
+        host = f'{host}:{parsed.port}'
+
+    tracking = TRACKING_PARAMS + (YOUTUBE_TRACKING_PARAMS if host in YOUTUBE_HOSTS else ())
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in tracking
+    ]
+
+    # youtu.be/ID, m.youtube.com/watch?v=ID&t=1 ... all preview the same video
+    video_id = None
+    if host == 'youtu.be':
+        video_id = parsed.path.strip('/').split('/')[0]
+    elif host in YOUTUBE_HOSTS and parsed.path == '/watch':
+        video_id = dict(query).get('v')
+    if video_id:
+        return f'https://www.youtube.com/watch?v={video_id}'
+
+    return urlunparse((scheme, host, parsed.path or '/', '', urlencode(sorted(query)), ''))
+
+def parse_link_preview(url, html):
+    """
+    Extract preview metadata from a page
+
+    Args:
+        url: The page's URL
+        html: The page's HTML
+
+    Returns:
+        Dict with title, description, image, source and url
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Get title
+    title = soup.title.string if soup.title else ''
+
+    # Try to get meta description
+    description = ''
+    description_meta = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', attrs={'property': 'og:description'})
+    if description_meta and description_meta.get('content'):
+        description = description_meta.get('content')
+
+    # Try to get image
+    image = ''
+    image_meta = soup.find('meta', attrs={'property': 'og:image'}) or soup.find('meta', attrs={'name': 'twitter:image'})
+    if image_meta and image_meta.get('content'):
+        image = image_meta.get('content')
+
+    # If no image found, try to find a significant image on the page
+    if not image:
+        # Look for large images in the page
+        images = soup.find_all('img')
+        for img in images:
+            # Skip tiny images, icons, or images without src
+            src = img.get('src', '')
+            if not src or src.startswith('data:'):
+                continue
+
+            # Check for width/height attributes or style containing dimensions
+            width = img.get('width', '0')
+            height = img.get('height', '0')
+
+            try:
+                # Convert to integers if possible
+                width = int(width) if width and width.isdigit() else 0
+                height = int(height) if height and height.isdigit() else 0
+
+                # If the image is reasonably sized, use it
+                if width > 100 and height > 100:
+                    # Convert relative URL to absolute
+                    if not src.startswith(('http://', 'https://')):
+                        base_url = urlparse(url)
+                        base_domain = f"{base_url.scheme}://{base_url.netloc}"
+                        if src.startswith('/'):
+                            src = f"{base_domain}{src}"
+                        else:
+                            src = f"{base_domain}/{src}"
+
+                    image = src
+                    break
+            except (ValueError, TypeError):
+                continue
+
+    # Get source domain
+    parsed_url = urlparse(url)
+    source = parsed_url.netloc
+
+    # Special handling for Google searches
+    if 'google.com' in source and '/search' in parsed_url.path:
+        query_params = parse_qs(parsed_url.query)
+
+        # Extract search query
+        if 'q' in query_params:
+            search_query = query_params['q'][0]
+            if not title or 'Google Search' in title:
+                title = f"Google Search: {search_query}"
+            if not description:
+                description = f"Search results for: {search_query}"
+
+            # If it's an image search, mention that
+            if '/images' in parsed_url.path or 'tbm=isch' in url:
+                title = f"Google Image Search: {search_query}"
+                description = f"Image search results for: {search_query}"
+
+        # If no image yet, use Google logo
+        if not image:
+            image = "https://www.google.com/images/branding/googlelogo/2x/googlelogo_color_272x92dp.png"
+
+    # Special handling for YouTube
+    elif 'youtube.com' in source or 'youtu.be' in source:
+        # If no image yet, try to get YouTube thumbnail
+        if not image:
+            video_id = None
+            if 'youtube.com/watch' in url and 'v=' in url:
+                query_params = parse_qs(parsed_url.query)
+                if 'v' in query_params:
+                    video_id = query_params['v'][0]
+            elif 'youtu.be/' in url:
+                video_id = url.split('youtu.be/')[1].split('?')[0]
+
+            if video_id:
+                image = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
+
+        # If no description, provide a generic one
+        if not description:
+            description = "YouTube video"
+
+    # Special handling for Twitter/X
+    elif 'twitter.com' in source or 'x.com' in source:
+        if not image:
+            image = "https://abs.twimg.com/responsive-web/client-web/icon-default.522d363a.png"
+        if not description:
+            description = "Tweet from Twitter/X"
+
+    return {
+        'title': title,
+        'description': description,
+        'image': image,
+        'source': source,
+        'url': url
+    }
+
+def fetch_link_preview(url, etag=None, last_modified=None):
+    """
+    Fetch a page and extract its preview, revalidating a cached copy when possible
+
+    Args:
+        url: Page to fetch
+        etag: ETag of the cached copy, if any
+        last_modified: Last-Modified of the cached copy, if any
+
+    Returns:
+        Tuple of (preview dict, or None if the cached copy is still current,
+        ETag, Last-Modified)
+
+    Raises:
+        requests.RequestException: If the page can't be fetched
+    """
+    headers = {'User-Agent': USER_AGENT}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    response = requests.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+    if response.status_code == 304:
+        return None, etag, last_modified
+    response.raise_for_status()
+    return (
+        parse_link_preview(url, response.text),
+        response.headers.get('ETag'),
+        response.headers.get('Last-Modified')
+    )
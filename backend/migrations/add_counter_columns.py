@@ -0,0 +1,38 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, reconcile_counters
+from sqlalchemy import text, inspect
+
+# (table, counter column)
+COUNTER_COLUMNS = (
+    ('post', 'comment_count'),
+    ('event', 'reference_count'),
+    ('tag', 'event_count'),
+)
+
+def upgrade():
+    # Denormalized counters read by list and feed endpoints
+    with db.engine.connect() as conn:
+        for table, column in COUNTER_COLUMNS:
+            columns = [existing['name'] for existing in inspect(conn).get_columns(table)]
+            if column not in columns:
+                conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0;'))
+                print(f"Added {column} column to {table} table")
+        conn.commit()
+        
+    # Fill them in from the existing rows
+    for name, fixed in reconcile_counters().items():
+        print(f"Backfilled {name} for {fixed} rows")
+    db.session.commit()
+
+def downgrade():
+    with db.engine.connect() as conn:
+        for table, column in COUNTER_COLUMNS:
+            conn.execute(text(f'ALTER TABLE {table} DROP COLUMN {column};'))
+        conn.commit()
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,24 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def upgrade():
+    # Index backing the tag filters on the timeline-v3 events endpoint
+    with db.engine.connect() as conn:
+        conn.execute(text('''
+            CREATE INDEX IF NOT EXISTS ix_event_tags_tag_event
+            ON event_tags (tag_id, event_id);
+        '''))
+        conn.commit()
+
+def downgrade():
+    with db.engine.connect() as conn:
+        conn.execute(text('DROP INDEX IF EXISTS ix_event_tags_tag_event;'))
+        conn.commit()
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
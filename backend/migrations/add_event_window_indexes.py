@@ -0,0 +1,29 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+def upgrade():
+    # Composite indexes backing the timeline-v3 date-window queries
+    with db.engine.connect() as conn:
+        conn.execute(text('''
+            CREATE INDEX IF NOT EXISTS ix_event_timeline_date
+            ON event (timeline_id, event_date);
+        '''))
+        conn.execute(text('''
+            CREATE INDEX IF NOT EXISTS ix_event_timeline_refs_timeline_event
+            ON event_timeline_refs (timeline_id, event_id);
+        '''))
+        conn.commit()
+
+def downgrade():
+    with db.engine.connect() as conn:
+        conn.execute(text('DROP INDEX IF EXISTS ix_event_timeline_date;'))
+        conn.execute(text('DROP INDEX IF EXISTS ix_event_timeline_refs_timeline_event;'))
+        conn.commit()
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,17 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, LinkPreview
+
+def upgrade():
+    # Cache of fetched link previews, keyed by normalized URL
+    LinkPreview.__table__.create(db.engine, checkfirst=True)
+    print("Ensured link_preview table exists")
+
+def downgrade():
+    LinkPreview.__table__.drop(db.engine, checkfirst=True)
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
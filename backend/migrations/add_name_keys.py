@@ -0,0 +1,93 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, normalize_name
+from sqlalchemy import text, inspect
+
+def merge_duplicate_tags(conn):
+    """Fold tags whose names differ only by case into the oldest one"""
+    tables = inspect(conn).get_table_names()
+    survivors = {}
+    for tag_id, name, timeline_id in conn.execute(text('SELECT id, name, timeline_id FROM tag ORDER BY id')).fetchall():
+        key = normalize_name(name)
+        if key not in survivors:
+            survivors[key] = (tag_id, timeline_id)
+            continue
+
+        survivor_id, survivor_timeline_id = survivors[key]
+        print(f"Merging tag {tag_id} '{name}' into tag {survivor_id}")
+        for table, column in (('event_tags', 'event_id'), ('post_tags', 'post_id')):
+            if table not in tables:
+                continue
+            # Drop links the survivor already has, then move the rest over
+            conn.execute(text(f'''
+                DELETE FROM {table}
+                WHERE tag_id = :duplicate
+                AND {column} IN (SELECT {column} FROM {table} WHERE tag_id = :survivor)
+            '''), {'duplicate': tag_id, 'survivor': survivor_id})
+            conn.execute(text(f'UPDATE {table} SET tag_id = :survivor WHERE tag_id = :duplicate'),
+                         {'duplicate': tag_id, 'survivor': survivor_id})
+        if survivor_timeline_id is None and timeline_id is not None:
+            conn.execute(text('UPDATE tag SET timeline_id = :timeline_id WHERE id = :id'),
+                         {'timeline_id': timeline_id, 'id': survivor_id})
+            survivors[key] = (survivor_id, timeline_id)
+        conn.execute(text('DELETE FROM tag WHERE id = :id'), {'id': tag_id})
+
+def rename_duplicate_timelines(conn):
+    """
+    Give timelines whose names differ only by case distinct names.
+
+    Timelines own events, posts and members, so they aren't merged
+    automatically; the oldest keeps its name and the others get their ID
+    appended. Use the timeline merge endpoint to combine them afterwards.
+    """
+    seen = set()
+    for timeline_id, name in conn.execute(text('SELECT id, name FROM timeline ORDER BY id')).fetchall():
+        key = normalize_name(name)
+        if key not in seen:
+            seen.add(key)
+            continue
+        new_name = f'{name} ({timeline_id})'
+        print(f"Renaming timeline {timeline_id} '{name}' to '{new_name}'")
+        conn.execute(text('UPDATE timeline SET name = :name WHERE id = :id'), {'name': new_name, 'id': timeline_id})
+        seen.add(normalize_name(new_name))
+
+def backfill_name_keys(conn, table):
+    rows = conn.execute(text(f'SELECT id, name FROM {table}')).fetchall()
+    if rows:
+        conn.execute(text(f'UPDATE {table} SET name_key = :name_key WHERE id = :id'),
+                     [{'id': row_id, 'name_key': normalize_name(name)} for row_id, name in rows])
+
+def upgrade():
+    # Stored case-insensitive name keys, so name lookups can use a unique index
+    with db.engine.connect() as conn:
+        for table in ('tag', 'timeline'):
+            columns = [column['name'] for column in inspect(conn).get_columns(table)]
+            if 'name_key' not in columns:
+                conn.execute(text(f'ALTER TABLE {table} ADD COLUMN name_key VARCHAR(100);'))
+                print(f"Added name_key column to {table} table")
+
+        merge_duplicate_tags(conn)
+        rename_duplicate_timelines(conn)
+
+        # Keys are computed in Python so they match normalize_name exactly
+        for table in ('tag', 'timeline'):
+            backfill_name_keys(conn, table)
+
+        conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ix_tag_name_key ON tag (name_key);'))
+        conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ix_timeline_name_key ON timeline (name_key);'))
+        conn.commit()
+    print("Backfilled name keys for tags and timelines")
+
+def downgrade():
+    with db.engine.connect() as conn:
+        conn.execute(text('DROP INDEX IF EXISTS ix_tag_name_key;'))
+        conn.execute(text('DROP INDEX IF EXISTS ix_timeline_name_key;'))
+        conn.execute(text('ALTER TABLE tag DROP COLUMN name_key;'))
+        conn.execute(text('ALTER TABLE timeline DROP COLUMN name_key;'))
+        conn.commit()
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,34 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text
+
+POST_FEED_INDEXES = {
+    'ix_post_created_at_id': 'post (created_at, id)',
+    'ix_post_upvotes_id': 'post (upvotes, id)',
+    'ix_post_promotion_score_id': 'post (promotion_score, id)',
+    'ix_post_timeline_event_date': 'post (timeline_id, event_date)',
+    'ix_comment_post_id': 'comment (post_id)',
+}
+
+def upgrade():
+    # Indexes backing the keyset-paginated posts feed and its comment counts
+    with db.engine.connect() as conn:
+        # Keyset comparisons skip NULLs, so give old rows the model defaults
+        conn.execute(text('UPDATE post SET upvotes = 0 WHERE upvotes IS NULL;'))
+        conn.execute(text('UPDATE post SET promotion_score = 0 WHERE promotion_score IS NULL;'))
+        for name, columns in POST_FEED_INDEXES.items():
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {columns};'))
+        conn.commit()
+
+def downgrade():
+    with db.engine.connect() as conn:
+        for name in POST_FEED_INDEXES:
+            conn.execute(text(f'DROP INDEX IF EXISTS {name};'))
+        conn.commit()
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
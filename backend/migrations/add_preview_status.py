@@ -0,0 +1,35 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text, inspect
+
+def upgrade():
+    # Whether each row's link preview has been fetched yet
+    with db.engine.connect() as conn:
+        for table in ('post', 'event'):
+            columns = [column['name'] for column in inspect(conn).get_columns(table)]
+            if 'preview_status' not in columns:
+                conn.execute(text(f'ALTER TABLE {table} ADD COLUMN preview_status VARCHAR(10);'))
+                print(f"Added preview_status column to {table} table")
+                
+            # Existing previews were fetched when the row was created; an empty
+            # title means that fetch failed
+            result = conn.execute(text(f'''
+                UPDATE {table}
+                SET preview_status = CASE WHEN url_title IS NULL OR url_title = '' THEN 'failed' ELSE 'ok' END
+                WHERE url IS NOT NULL AND url != '' AND preview_status IS NULL;
+            '''))
+            print(f"Backfilled preview_status for {result.rowcount} {table} rows")
+        conn.commit()
+
+def downgrade():
+    with db.engine.connect() as conn:
+        for table in ('post', 'event'):
+            conn.execute(text(f'ALTER TABLE {table} DROP COLUMN preview_status;'))
+        conn.commit()
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,37 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from search import SEARCH_KINDS, search_index_ddl, search_index_drop_ddl, search_backfill_sql
+from sqlalchemy import text
+
+def upgrade():
+    # Full-text search tables (FTS5 on SQLite, tsvector + GIN on Postgres) and their sync triggers
+    dialect = db.engine.dialect.name
+    with db.engine.connect() as conn:
+        # The sync triggers look up each event's tags
+        conn.execute(text('''
+            CREATE INDEX IF NOT EXISTS ix_event_tags_event_tag
+            ON event_tags (event_id, tag_id);
+        '''))
+        for statement in search_index_ddl(dialect):
+            conn.execute(text(statement))
+            
+        # Index everything already in the database; rerunning rebuilds the index
+        for kind, (search_table, *_) in SEARCH_KINDS.items():
+            if dialect != 'postgresql':
+                conn.execute(text(f'DELETE FROM {search_table};'))
+            conn.execute(text(search_backfill_sql(dialect, kind)))
+            print(f"Indexed {kind}s for search")
+        conn.commit()
+
+def downgrade():
+    with db.engine.connect() as conn:
+        for statement in search_index_drop_ddl(db.engine.dialect.name):
+            conn.execute(text(statement))
+        conn.commit()
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
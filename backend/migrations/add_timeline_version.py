@@ -0,0 +1,27 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from sqlalchemy import text, inspect
+
+def upgrade():
+    # Add the version counter used to validate cached timeline reads
+    columns = [column['name'] for column in inspect(db.engine).get_columns('timeline')]
+    if 'version' in columns:
+        print("Version column already exists in timeline table")
+        return
+        
+    with db.engine.connect() as conn:
+        conn.execute(text('ALTER TABLE timeline ADD COLUMN version INTEGER NOT NULL DEFAULT 0;'))
+        conn.commit()
+    print("Added version column to timeline table")
+
+def downgrade():
+    with db.engine.connect() as conn:
+        conn.execute(text('ALTER TABLE timeline DROP COLUMN version;'))
+        conn.commit()
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
@@ -0,0 +1,40 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, TokenBlocklist
+from datetime import timezone
+from sqlalchemy import text, inspect
+
+def upgrade():
+    # Expiry of each revoked token, so expired rows can be purged
+    with db.engine.connect() as conn:
+        columns = [column['name'] for column in inspect(conn).get_columns('token_blocklist')]
+        if 'expires_at' not in columns:
+            conn.execute(text('ALTER TABLE token_blocklist ADD COLUMN expires_at TIMESTAMP;'))
+            print("Added expires_at column to token_blocklist table")
+            
+        # Existing rows didn't record which kind of token they revoked; assume
+        # the longest-lived one (created_at is local time, expires_at is UTC)
+        lifetime = app.config['JWT_REFRESH_TOKEN_EXPIRES']
+        table = TokenBlocklist.__table__
+        rows = conn.execute(db.select(table.c.id, table.c.created_at).where(table.c.expires_at.is_(None))).fetchall()
+        if rows:
+            conn.execute(table.update().where(table.c.id == db.bindparam('row_id')), [
+                {'row_id': row_id, 'expires_at': (created_at.astimezone(timezone.utc) + lifetime).replace(tzinfo=None)}
+                for row_id, created_at in rows
+            ])
+            print(f"Backfilled expires_at for {len(rows)} rows")
+            
+        conn.execute(text('CREATE INDEX IF NOT EXISTS ix_token_blocklist_expires_at ON token_blocklist (expires_at);'))
+        conn.commit()
+
+def downgrade():
+    with db.engine.connect() as conn:
+        conn.execute(text('DROP INDEX IF EXISTS ix_token_blocklist_expires_at;'))
+        conn.execute(text('ALTER TABLE token_blocklist DROP COLUMN expires_at;'))
+        conn.commit()
+
+if __name__ == '__main__':
+    with app.app_context():
+        upgrade()
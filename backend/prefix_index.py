@@ -0,0 +1,171 @@
+import bisect
+import heapq
+import sys
+import threading
+
+# Prefixes up to this length match too many names to rank per lookup, so
+# their best entries are kept ready
+SHORT_PREFIX_LENGTH = 2
+
+def prefix_key(name):
+    """Key names are matched by: lowercase, without surrounding whitespace or a leading '#'"""
+    return name.strip().lower().lstrip('#')
+
+class PrefixIndex:
+    """
+    An in-memory, weighted prefix index of names
+
+    Entries are (kind, id, name, weight) where kind is e.g. 'tag' or
+    'timeline'. Keys live in one sorted list, so the matches for a prefix
+    are a contiguous slice found with two binary searches, and the heaviest
+    matches are picked from that slice.
+
+    One- and two-character prefixes can match a large share of all names,
+    so for those the top ``top_size`` entries per kind are cached. Weights
+    only grow between rebuilds, so the cached lists are kept exact as
+    entries are added or bumped; renames and removals drop the affected
+    lists, which are recomputed on next use.
+    """
+
+    def __init__(self, top_size=50):
+        self.top_size = top_size
+        self._keys = []  # sorted (key, kind, id)
+        self._entries = {}  # (kind, id) -> [key, name, weight]
+        self._top = {}  # (short prefix, kind) -> best (kind, id) first
+        self._kinds = set()
+        self._lock = threading.Lock()
+
+    def _rank(self, item):
+        """Sort key for a (kind, id): heaviest first, then alphabetical"""
+        key, name, weight = self._entries[item]
+        return (-weight, key, name, item)
+
+    def _short_prefixes(self, key):
+        return [key[:length] for length in range(1, min(len(key), SHORT_PREFIX_LENGTH) + 1)]
+
+    def _matches(self, prefix, kind=None):
+        """All (kind, id) whose key starts with prefix (call with the lock held)"""
+        start = bisect.bisect_left(self._keys, (prefix,))
+        # Keys starting with prefix sort before prefix with its last character
+        # incremented; a trailing chr(sys.maxunicode) has no successor, so it
+        # is dropped first, and a prefix made only of it matches to the end
+        upper = prefix.rstrip(chr(sys.maxunicode))
+        if upper:
+            end = bisect.bisect_left(self._keys, (upper[:-1] + chr(ord(upper[-1]) + 1),), start)
+        else:
+            end = len(self._keys)
+        return [
+            (entry_kind, entry_id)
+            for _, entry_kind, entry_id in self._keys[start:end]
+            if kind is None or entry_kind == kind
+        ]
+
+    def _top_entries(self, prefix, kind):
+        """The cached best entries for a short prefix and kind (call with the lock held)"""
+        top = self._top.get((prefix, kind))
+        if top is None:
+            top = heapq.nsmallest(self.top_size, self._matches(prefix, kind), key=self._rank)
+            self._top[(prefix, kind)] = top
+        return top
+
+    def _offer(self, kind, entry_id):
+        """Move a new or heavier entry into the cached lists it now qualifies for"""
+        item = (kind, entry_id)
+        rank = self._rank(item)
+        for prefix in self._short_prefixes(self._entries[item][0]):
+            top = self._top.get((prefix, kind))
+            if top is None:
+                continue
+            if item in top:
+                top.remove(item)
+            elif len(top) >= self.top_size and rank >= self._rank(top[-1]):
+                continue
+            top.insert(bisect.bisect_left([self._rank(other) for other in top], rank), item)
+            del top[self.top_size:]
+
+    def _invalidate(self, key):
+        """Drop the cached lists a key contributes to"""
+        for prefix in self._short_prefixes(key):
+            for cached in [cached for cached in self._top if cached[0] == prefix]:
+                del self._top[cached]
+
+    def replace(self, entries):
+        """
+        Rebuild the whole index
+
+        Args:
+            entries: Iterable of (kind, id, name, weight)
+        """
+        new_entries = {}
+        for kind, entry_id, name, weight in entries:
+            new_entries[(kind, entry_id)] = [prefix_key(name), name, weight or 0]
+        new_keys = sorted((key, kind, entry_id) for (kind, entry_id), (key, _, _) in new_entries.items())
+        with self._lock:
+            self._entries = new_entries
+            self._keys = new_keys
+            self._top = {}
+            self._kinds = {kind for kind, _ in new_entries}
+
+    def add(self, kind, entry_id, name, weight=0):
+        """Insert an entry, or rename and reweight it if already present"""
+        key = prefix_key(name)
+        with self._lock:
+            existing = self._entries.get((kind, entry_id))
+            if existing is not None and (existing[0] != key or (weight or 0) < existing[2]):
+                # Renamed or lighter: the cached lists can't be patched in place
+                self._keys.remove((existing[0], kind, entry_id))
+                self._invalidate(existing[0])
+                existing = None
+            if existing is None:
+                bisect.insort(self._keys, (key, kind, entry_id))
+            self._entries[(kind, entry_id)] = [key, name, weight or 0]
+            self._kinds.add(kind)
+            self._offer(kind, entry_id)
+
+    def add_weight(self, kind, entry_id, amount=1):
+        """Bump an entry's weight, e.g. when a tag is used again; unknown entries are ignored"""
+        with self._lock:
+            entry = self._entries.get((kind, entry_id))
+            if entry:
+                entry[2] += amount
+                self._offer(kind, entry_id)
+
+    def remove(self, kind, entry_id):
+        """Drop an entry if present"""
+        with self._lock:
+            entry = self._entries.pop((kind, entry_id), None)
+            if entry:
+                self._keys.remove((entry[0], kind, entry_id))
+                self._invalidate(entry[0])
+
+    def search(self, prefix, limit=10, kinds=None):
+        """
+        Find the heaviest entries whose key starts with a prefix
+
+        Args:
+            prefix: Text typed so far
+            limit: Maximum number of results
+            kinds: Optional collection of kinds to include
+
+        Returns:
+            List of {'type', 'id', 'name', 'weight'} dicts, heaviest first
+            (ties broken alphabetically)
+        """
+        prefix = prefix_key(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            if len(prefix) <= SHORT_PREFIX_LENGTH and limit <= self.top_size:
+                # The best entries overall are among the best of each kind
+                candidates = [item for kind in (kinds or self._kinds) for item in self._top_entries(prefix, kind)]
+            else:
+                candidates = [item for item in self._matches(prefix) if not kinds or item[0] in kinds]
+            best = heapq.nsmallest(limit, candidates, key=self._rank)
+            return [
+                {'type': kind, 'id': entry_id, 'name': self._entries[(kind, entry_id)][1],
+                 'weight': self._entries[(kind, entry_id)][2]}
+                for kind, entry_id in best
+            ]
+
+    def __len__(self):
+        return len(self._keys)
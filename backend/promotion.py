@@ -0,0 +1,50 @@
+import numpy as np
+
+# Weights of the two signals in a post's base promotion score
+PROMOTION_VOTE_WEIGHT = 0.7
+PROMOTION_SOURCE_WEIGHT = 0.3
+
+# Posts lose a tenth of their score per day once older than a week, down to
+# a tenth of the base score
+PROMOTION_GRACE_DAYS = 7
+PROMOTION_DECAY_PER_DAY = 0.1
+PROMOTION_MIN_TIME_FACTOR = 0.1
+
+# Posts scoring at least this are shown in the timeline view
+PROMOTION_THRESHOLD = 5.0
+
+def promotion_scores(votes, sources, created_at, now):
+    """
+    Score many posts at once
+
+    Vectorized form of Post.update_promotion_score: the base score is a
+    weighted sum of promotion votes and sources, decayed by whole days of
+    age past the grace period.
+
+    Args:
+        votes: Sequence of promotion vote counts (None counts as 0)
+        sources: Sequence of source counts (None counts as 0)
+        created_at: Sequence of naive creation datetimes (None counts as
+            brand new)
+        now: Naive datetime to measure age against, in the same clock as
+            created_at
+
+    Returns:
+        Tuple of (float64 score array, bool promoted array)
+    """
+    votes = np.array(votes, dtype=np.float64)
+    sources = np.array(sources, dtype=np.float64)
+    created_at = np.array(created_at, dtype='datetime64[us]')
+    now = np.datetime64(now, 'us')
+
+    base_scores = np.nan_to_num(votes) * PROMOTION_VOTE_WEIGHT + np.nan_to_num(sources) * PROMOTION_SOURCE_WEIGHT
+
+    # Floor division matches timedelta.days, including for future dates
+    days_old = (now - np.where(np.isnat(created_at), now, created_at)) // np.timedelta64(1, 'D')
+    time_factors = np.where(
+        days_old <= PROMOTION_GRACE_DAYS,
+        1.0,
+        1.0 - PROMOTION_DECAY_PER_DAY * (days_old - PROMOTION_GRACE_DAYS)
+    )
+    scores = base_scores * np.maximum(time_factors, PROMOTION_MIN_TIME_FACTOR)
+    return scores, scores >= PROMOTION_THRESHOLD
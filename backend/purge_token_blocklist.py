@@ -0,0 +1,32 @@
+"""
+Delete token blocklist rows whose tokens have expired.
+
+Usage:
+    python purge_token_blocklist.py
+
+A revoked token only needs to stay on the blocklist until its own expiry,
+after which JWT validation rejects it anyway. Run this from cron (e.g.
+daily) so the table stays small.
+"""
+
+from app import app, db, purge_expired_tokens
+import sys
+
+def purge():
+    with app.app_context():
+        db.create_all()
+        
+        try:
+            deleted = purge_expired_tokens()
+            db.session.commit()
+            print(f"Removed {deleted} expired tokens from the blocklist.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error purging token blocklist: {str(e)}")
+            return False
+        
+        return True
+
+if __name__ == "__main__":
+    success = purge()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,36 @@
+"""
+Rebuild the timeline rollup and stats tables from the event table.
+
+Usage:
+    python rebuild_rollups.py              # rebuild every timeline
+    python rebuild_rollups.py 3 12 ...     # rebuild only the given timeline IDs
+
+Rollups are normally kept up to date by the write endpoints; run this after
+creating the tables for the first time or to repair drift.
+"""
+
+from app import app, db, rebuild_timeline_rollups
+import sys
+
+def rebuild(timeline_ids=None):
+    with app.app_context():
+        db.create_all()
+        
+        scope = f"timelines {', '.join(map(str, timeline_ids))}" if timeline_ids else "all timelines"
+        print(f"Rebuilding rollups for {scope}...")
+        
+        try:
+            counted = rebuild_timeline_rollups(timeline_ids)
+            db.session.commit()
+            print(f"Counted {counted} timeline event memberships. Rollups rebuilt successfully!")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error rebuilding rollups: {str(e)}")
+            return False
+        
+        return True
+
+if __name__ == "__main__":
+    timeline_ids = [int(arg) for arg in sys.argv[1:]] or None
+    success = rebuild(timeline_ids)
+    sys.exit(0 if success else 1)
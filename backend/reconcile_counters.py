@@ -0,0 +1,39 @@
+"""
+Recount the denormalized counter columns from their source tables.
+
+Usage:
+    python reconcile_counters.py                          # every counter
+    python reconcile_counters.py post.comment_count ...   # only the named counters
+
+The write paths keep Post.comment_count, Event.reference_count and
+Tag.event_count up to date with atomic increments; run this after manual
+database edits or periodically to repair any drift.
+"""
+
+from app import app, db, reconcile_counters, COUNTER_SOURCES
+import sys
+
+def reconcile(names=None):
+    with app.app_context():
+        db.create_all()
+        
+        unknown = set(names or ()) - set(COUNTER_SOURCES)
+        if unknown:
+            print(f"Unknown counters: {', '.join(sorted(unknown))} (choose from {', '.join(COUNTER_SOURCES)})")
+            return False
+        
+        try:
+            fixed = reconcile_counters(names)
+            db.session.commit()
+            for name, count in fixed.items():
+                print(f"{name}: corrected {count} rows")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error reconciling counters: {str(e)}")
+            return False
+        
+        return True
+
+if __name__ == "__main__":
+    success = reconcile(sys.argv[1:] or None)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,33 @@
+"""
+Renormalize the trending scores.
+
+Usage:
+    python renormalize_trending.py
+
+Trending scores grow by a factor of two every half-life relative to a
+fixed epoch; this moves the epoch to now, rescales every score in one
+UPDATE and drops entries that have decayed to nothing. Run it from cron
+about once a day.
+"""
+
+from app import app, db, renormalize_trending_scores
+import sys
+
+def renormalize():
+    with app.app_context():
+        db.create_all()
+        
+        try:
+            rescaled, deleted = renormalize_trending_scores()
+            db.session.commit()
+            print(f"Rescaled {rescaled} trending scores and removed {deleted} inactive ones.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error renormalizing trending scores: {str(e)}")
+            return False
+        
+        return True
+
+if __name__ == "__main__":
+    success = renormalize()
+    sys.exit(0 if success else 1)
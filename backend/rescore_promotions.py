@@ -0,0 +1,38 @@
+"""
+Recompute the promotion scores of posts.
+
+Usage:
+    python rescore_promotions.py              # rescore every post
+    python rescore_promotions.py 3 12 ...     # rescore only posts in the given timeline IDs
+
+Scores decay with post age but are otherwise only updated when someone
+votes; run this from cron (e.g. hourly) to keep them and the promoted
+flags current.
+"""
+
+from app import app, db, rescore_posts
+import sys
+
+def rescore(timeline_ids=None):
+    with app.app_context():
+        db.create_all()
+        
+        scope = f"timelines {', '.join(map(str, timeline_ids))}" if timeline_ids else "all timelines"
+        print(f"Rescoring posts in {scope}...")
+        
+        try:
+            # Short transactions, so concurrent writers aren't locked out for the whole run
+            scored, updated = rescore_posts(timeline_ids, commit_every_batch=True)
+            db.session.commit()
+            print(f"Scored {scored} posts and updated {updated} that changed.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error rescoring posts (batches before the failure were saved): {str(e)}")
+            return False
+        
+        return True
+
+if __name__ == "__main__":
+    timeline_ids = [int(arg) for arg in sys.argv[1:]] or None
+    success = rescore(timeline_ids)
+    sys.exit(0 if success else 1)
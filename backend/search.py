@@ -0,0 +1,253 @@
+import base64
+import json
+import re
+
+# Searchable record kinds: (search table, source table, tag link table, tag link column, text columns)
+# Text columns are listed by weight, highest first, and are the columns of the search table
+SEARCH_KINDS = {
+    'event': ('event_search', 'event', 'event_tags', 'event_id', ('title', 'tags', 'url_title', 'description')),
+    'post': ('post_search', 'post', 'post_tags', 'post_id', ('title', 'tags', 'url_title', 'content')),
+}
+
+# bm25() column weights for SQLite, parallel to the text columns
+SQLITE_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+
+# setweight() labels for Postgres, parallel to the text columns
+POSTGRES_WEIGHTS = ('A', 'B', 'C', 'D')
+
+# Words of a query that are searched for; the rest is ignored
+MAX_SEARCH_TERMS = 12
+
+def search_terms(query):
+    """
+    Split a search box query into plain words
+
+    Only word characters are kept, so user input can never inject FTS
+    operators into the MATCH / tsquery expression.
+
+    Args:
+        query: Raw query string
+
+    Returns:
+        List of lowercase words (at most MAX_SEARCH_TERMS)
+    """
+    return re.findall(r'\w+', (query or '').lower())[:MAX_SEARCH_TERMS]
+
+def _tag_names_sql(dialect, kind, row_id):
+    """SQL expression listing the tag names of one record, space separated"""
+    _, _, link_table, link_column, _ = SEARCH_KINDS[kind]
+    aggregate = "string_agg(tag.name, ' ')" if dialect == 'postgresql' else "group_concat(tag.name, ' ')"
+    return (
+        f"coalesce((SELECT {aggregate} FROM {link_table} "
+        f"JOIN tag ON tag.id = {link_table}.tag_id WHERE {link_table}.{link_column} = {row_id}), '')"
+    )
+
+def _source_value(kind, column, row):
+    """SQL expression for one search column of a source row alias"""
+    if column == 'tags':
+        return _tag_names_sql('sqlite', kind, f'{row}.id')
+    return f"coalesce({row}.{column}, '')"
+
+def _postgres_document(kind, row):
+    """SQL expression building the weighted tsvector of a source row alias"""
+    _, _, _, _, columns = SEARCH_KINDS[kind]
+    parts = []
+    for column, weight in zip(columns, POSTGRES_WEIGHTS):
+        if column == 'tags':
+            value = _tag_names_sql('postgresql', kind, f'{row}.id')
+        else:
+            value = f"coalesce({row}.{column}, '')"
+        parts.append(f"setweight(to_tsvector('english', {value}), '{weight}')")
+    return ' || '.join(parts)
+
+def search_index_ddl(dialect):
+    """
+    Statements creating the search tables, their sync triggers and indexes
+
+    SQLite gets one FTS5 table per kind keyed by rowid; Postgres gets a
+    table of weighted tsvectors with a GIN index. Triggers on the source
+    tables and their tag links keep both up to date, so every code path
+    that writes events or posts (ORM, bulk import, merges) is covered.
+
+    Args:
+        dialect: 'sqlite' or 'postgresql'
+
+    Returns:
+        List of SQL statements, safe to run more than once
+    """
+    statements = []
+    for kind, (search_table, source_table, link_table, link_column, columns) in SEARCH_KINDS.items():
+        text_columns = [column for column in columns if column != 'tags']
+        if dialect == 'postgresql':
+            statements += [
+                f'''CREATE TABLE IF NOT EXISTS {search_table} (
+                    {source_table}_id INTEGER PRIMARY KEY REFERENCES {source_table} (id) ON DELETE CASCADE,
+                    document TSVECTOR NOT NULL
+                )''',
+                f'CREATE INDEX IF NOT EXISTS ix_{search_table}_document ON {search_table} USING GIN (document)',
+                f'''CREATE OR REPLACE FUNCTION {search_table}_refresh(target INTEGER) RETURNS VOID AS $$
+                    INSERT INTO {search_table} ({source_table}_id, document)
+                    SELECT source.id, {_postgres_document(kind, 'source')}
+                    FROM {source_table} source WHERE source.id = target
+                    ON CONFLICT ({source_table}_id) DO UPDATE SET document = excluded.document
+                $$ LANGUAGE sql''',
+                f'''CREATE OR REPLACE FUNCTION {search_table}_source_trigger() RETURNS TRIGGER AS $$
+                BEGIN
+                    PERFORM {search_table}_refresh(NEW.id);
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql''',
+                f'''CREATE OR REPLACE FUNCTION {search_table}_tags_trigger() RETURNS TRIGGER AS $$
+                BEGIN
+                    IF TG_OP = 'DELETE' THEN
+                        PERFORM {search_table}_refresh(OLD.{link_column});
+                    ELSE
+                        PERFORM {search_table}_refresh(NEW.{link_column});
+                    END IF;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql''',
+                f'DROP TRIGGER IF EXISTS {search_table}_source_sync ON {source_table}',
+                f'''CREATE TRIGGER {search_table}_source_sync
+                    AFTER INSERT OR UPDATE OF {', '.join(text_columns)} ON {source_table}
+                    FOR EACH ROW EXECUTE FUNCTION {search_table}_source_trigger()''',
+                f'DROP TRIGGER IF EXISTS {search_table}_tags_sync ON {link_table}',
+                f'''CREATE TRIGGER {search_table}_tags_sync
+                    AFTER INSERT OR DELETE ON {link_table}
+                    FOR EACH ROW EXECUTE FUNCTION {search_table}_tags_trigger()''',
+            ]
+        else:
+            values = ', '.join(_source_value(kind, column, 'new') for column in columns)
+            statements += [
+                f'''CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} USING fts5(
+                    {', '.join(columns)}, tokenize = 'porter unicode61 remove_diacritics 2'
+                )''',
+                f'''CREATE TRIGGER IF NOT EXISTS {search_table}_source_insert AFTER INSERT ON {source_table} BEGIN
+                    INSERT INTO {search_table} (rowid, {', '.join(columns)}) VALUES (new.id, {values});
+                END''',
+                f'''CREATE TRIGGER IF NOT EXISTS {search_table}_source_update
+                AFTER UPDATE OF {', '.join(text_columns)} ON {source_table} BEGIN
+                    UPDATE {search_table} SET {', '.join(f"{column} = coalesce(new.{column}, '')" for column in text_columns)}
+                    WHERE rowid = new.id;
+                END''',
+                f'''CREATE TRIGGER IF NOT EXISTS {search_table}_source_delete AFTER DELETE ON {source_table} BEGIN
+                    DELETE FROM {search_table} WHERE rowid = old.id;
+                END''',
+                f'''CREATE TRIGGER IF NOT EXISTS {search_table}_tags_insert AFTER INSERT ON {link_table} BEGIN
+                    UPDATE {search_table} SET tags = {_tag_names_sql('sqlite', kind, f'new.{link_column}')} WHERE rowid = new.{link_column};
+                END''',
+                f'''CREATE TRIGGER IF NOT EXISTS {search_table}_tags_delete AFTER DELETE ON {link_table} BEGIN
+                    UPDATE {search_table} SET tags = {_tag_names_sql('sqlite', kind, f'old.{link_column}')} WHERE rowid = old.{link_column};
+                END''',
+            ]
+    return statements
+
+def search_index_drop_ddl(dialect):
+    """Statements removing everything search_index_ddl creates"""
+    statements = []
+    for search_table, source_table, link_table, _, _ in SEARCH_KINDS.values():
+        if dialect == 'postgresql':
+            statements += [
+                f'DROP TRIGGER IF EXISTS {search_table}_source_sync ON {source_table}',
+                f'DROP TRIGGER IF EXISTS {search_table}_tags_sync ON {link_table}',
+                f'DROP FUNCTION IF EXISTS {search_table}_source_trigger()',
+                f'DROP FUNCTION IF EXISTS {search_table}_tags_trigger()',
+                f'DROP FUNCTION IF EXISTS {search_table}_refresh(INTEGER)',
+            ]
+        else:
+            statements += [
+                f'DROP TRIGGER IF EXISTS {search_table}_{trigger}'
+                for trigger in ('source_insert', 'source_update', 'source_delete', 'tags_insert', 'tags_delete')
+            ]
+        statements.append(f'DROP TABLE IF EXISTS {search_table}')
+    return statements
+
+def search_backfill_sql(dialect, kind):
+    """Statement (re)building the whole search table of one kind from its source table"""
+    search_table, source_table, _, _, columns = SEARCH_KINDS[kind]
+    if dialect == 'postgresql':
+        return f'''
+            INSERT INTO {search_table} ({source_table}_id, document)
+            SELECT source.id, {_postgres_document(kind, 'source')} FROM {source_table} source
+            ON CONFLICT ({source_table}_id) DO UPDATE SET document = excluded.document
+        '''
+    values = ', '.join(_source_value(kind, column, 'source') for column in columns)
+    return f'''
+        INSERT INTO {search_table} (rowid, {', '.join(columns)})
+        SELECT source.id, {values} FROM {source_table} source
+    '''
+
+def encode_search_cursor(rank, row_id):
+    """Build the opaque cursor pointing just past a search result"""
+    payload = json.dumps([rank, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_search_cursor(cursor):
+    """
+    Decode a cursor produced by encode_search_cursor
+
+    Returns:
+        A (rank, id) tuple
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(rank), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Malformed cursor')
+
+def search_sql(dialect, kind, terms, scope_sql=None, cursor=None, limit=20):
+    """
+    Build the ranked, keyset-paginated search query for one kind
+
+    Only the search table (and, for scoping, indexed ID lookups) is read;
+    the source table is never scanned. Results are ordered best first,
+    with ties broken by newest ID. Ranks are normalized so lower is better
+    on both dialects (bm25 already is; ts_rank_cd is negated).
+
+    Args:
+        dialect: 'sqlite' or 'postgresql'
+        kind: One of SEARCH_KINDS
+        terms: Words from search_terms(); the last is matched as a prefix
+        scope_sql: Optional condition restricting results, e.g. to a timeline's
+            events, with {id} standing for the result's ID. It should be a
+            correlated EXISTS check: an IN list of IDs makes SQLite probe
+            the FTS index once per listed ID
+        cursor: Optional (rank, id) from decode_search_cursor
+        limit: Rows to return
+
+    Returns:
+        Tuple of (SQL string, bind parameters) selecting id and score columns
+    """
+    search_table, source_table, _, _, _ = SEARCH_KINDS[kind]
+    params = {'limit': limit}
+    if dialect == 'postgresql':
+        params['match'] = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+        id_column = f'{search_table}.{source_table}_id'
+        rank = f'-ts_rank_cd({search_table}.document, to_tsquery(\'english\', :match))'
+        conditions = [f"{search_table}.document @@ to_tsquery('english', :match)"]
+    else:
+        params['match'] = ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+        id_column = f'{search_table}.rowid'
+        rank = f"bm25({search_table}, {', '.join(str(weight) for weight in SQLITE_WEIGHTS)})"
+        conditions = [f'{search_table} MATCH :match']
+
+    if scope_sql:
+        conditions.append(f"({scope_sql.format(id=id_column)})")
+    # Rank each match once in a subquery, then page through the ranked rows
+    keyset = ''
+    if cursor:
+        params['cursor_rank'], params['cursor_id'] = cursor
+        keyset = 'WHERE score > :cursor_rank OR (score = :cursor_rank AND id < :cursor_id) '
+
+    sql = (
+        f"SELECT id, score FROM ("
+        f"SELECT {id_column} AS id, {rank} AS score FROM {search_table} "
+        f"WHERE {' AND '.join(conditions)}"
+        f") AS matches {keyset}"
+        f"ORDER BY score, id DESC LIMIT :limit"
+    )
+    return sql, params
@@ -0,0 +1,205 @@
+import json
+from datetime import datetime, timedelta
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack responses are only offered when installed
+    msgpack = None
+
+# Media types accepted for MessagePack responses (the first is sent back)
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+# Event fields holding datetimes, sent as epoch microseconds in columnar payloads
+EVENT_DATE_FIELDS = ('event_date', 'created_at')
+
+EPOCH = datetime(1970, 1, 1)
+
+# Every field of an event payload, in response order
+EVENT_FIELDS = (
+    'id', 'title', 'description', 'event_date', 'type',
+    'url', 'url_title', 'url_description', 'url_image', 'preview_status',
+    'media_url', 'media_type', 'timeline_id', 'created_by', 'created_at',
+    'reference_count', 'tags'
+)
+
+# Plain columns of a post payload (timeline and author are added separately)
+POST_FIELDS = (
+    'id', 'title', 'content', 'event_date', 'created_at', 'upvotes', 'comment_count',
+    'url', 'url_title', 'url_description', 'url_image', 'preview_status'
+)
+
+# Related records that can be embedded with ``include=``
+INCLUDE_OPTIONS = ('author',)
+
+def parse_fields(value, allowed=EVENT_FIELDS):
+    """
+    Parse a ``fields=`` projection such as 'id,event_date,type'
+
+    Args:
+        value: Comma-separated field names, or None/empty for all fields
+        allowed: The fields that may be requested
+
+    Returns:
+        Tuple of field names in the order of ``allowed``
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not value:
+        return tuple(allowed)
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown field: {', '.join(sorted(unknown))}")
+    return tuple(field for field in allowed if field in requested)
+
+def parse_include(value, allowed=INCLUDE_OPTIONS):
+    """
+    Parse an ``include=`` list such as 'author'
+
+    Args:
+        value: Comma-separated names, or None/empty for nothing
+        allowed: The names that may be requested
+
+    Returns:
+        Set of requested names
+
+    Raises:
+        ValueError: If an unknown name is requested
+    """
+    requested = {name.strip() for name in (value or '').split(',') if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown include: {', '.join(sorted(unknown))}")
+    return requested
+
+def serialize_author(user):
+    """Serialize a User (or anything with the same attributes) for embedding as an author"""
+    return {'id': user.id, 'username': user.username, 'avatar_url': user.avatar_url}
+
+def serialize_tag(tag):
+    """Serialize a Tag for event payloads"""
+    return {'id': tag.id, 'name': tag.name}
+
+def serialize_event(event, fields=EVENT_FIELDS, tags=None, author=None):
+    """
+    Build the payload dict for an event
+
+    Dates are left as datetime objects; dumps() formats them, which is
+    much cheaper than calling isoformat() per field.
+
+    Args:
+        event: Event model instance
+        fields: Fields to include (see parse_fields)
+        tags: Pre-built tag list; defaults to the event's own tags
+        author: Pre-built author payload to embed, if any
+
+    Returns:
+        Dict ready to pass to dumps()
+    """
+    payload = {}
+    for field in fields:
+        if field == 'tags':
+            payload['tags'] = tags if tags is not None else [serialize_tag(tag) for tag in event.tags]
+        else:
+            payload[field] = getattr(event, field)
+    if author is not None:
+        payload['author'] = author
+    return payload
+
+def to_epoch_us(value):
+    """Convert a naive UTC datetime to integer microseconds since the Unix epoch"""
+    if value is None:
+        return None
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+def serialize_events_columnar(events, fields=EVENT_FIELDS, tags=None, authors=None):
+    """
+    Build a column-per-field payload for a list of events
+
+    Each key appears once instead of once per event, e.g.
+    {"id": [1, 2], "event_date": [1740823200000000, ...], "type": [...]}.
+    Datetimes become integer microseconds since the Unix epoch (UTC), which
+    keeps full precision and is far cheaper to parse than ISO strings.
+
+    Args:
+        events: Event model instances
+        fields: Fields to include (see parse_fields)
+        tags: Optional pre-built tag lists, parallel to events
+        authors: Optional author payloads, parallel to events
+
+    Returns:
+        Dict of field name -> list of values
+    """
+    columns = {}
+    for field in fields:
+        if field == 'tags':
+            if tags is not None:
+                columns['tags'] = list(tags)
+            else:
+                columns['tags'] = [[serialize_tag(tag) for tag in event.tags] for event in events]
+        elif field in EVENT_DATE_FIELDS:
+            columns[field] = [to_epoch_us(getattr(event, field)) for event in events]
+        else:
+            columns[field] = [getattr(event, field) for event in events]
+    if authors is not None:
+        columns['author'] = list(authors)
+    return columns
+
+def serialize_post(post, timeline=None, author=None):
+    """
+    Build the feed payload dict for a post
+
+    Args:
+        post: Post model instance
+        timeline: The post's Timeline, if it should be embedded
+        author: The post's User, if it should be embedded
+
+    Returns:
+        Dict ready to pass to dumps()
+    """
+    payload = {field: getattr(post, field) for field in POST_FIELDS}
+    if timeline is not None:
+        payload['timeline'] = {
+            'id': timeline.id,
+            'name': timeline.name
+        }
+    if author is not None:
+        payload['author'] = serialize_author(author)
+    return payload
+
+def _default(value):
+    """Encode the non-JSON types found in payloads for the standard library encoder"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps(payload):
+    """
+    Encode a payload as compact JSON bytes
+
+    Uses orjson when installed (several times faster, with native datetime
+    support) and the standard library otherwise; both produce the same
+    ISO 8601 strings as datetime.isoformat().
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode()
+
+def packb(payload):
+    """
+    Encode a payload as MessagePack bytes
+
+    Datetimes are sent as the same ISO 8601 strings as in JSON responses.
+
+    Raises:
+        RuntimeError: If msgpack is not installed
+    """
+    if msgpack is None:
+        raise RuntimeError('msgpack is not installed')
+    return msgpack.packb(payload, default=_default)